@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, Column, Integer, String
+from sqlalchemy import create_engine, Column, Integer, String, Text, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
@@ -26,6 +26,19 @@ class UserModel(Base):
     google_id = Column(String, unique=True, index=True, nullable=False)
 
 
+class TopicContentModel(Base):
+    __tablename__ = "topic_content"
+    __table_args__ = (UniqueConstraint("topic_key", "task_type", "learning_style"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    topic_key = Column(String, index=True, nullable=False)
+    topic = Column(String, nullable=False)
+    task_type = Column(String, nullable=False)
+    learning_style = Column(String, nullable=False)
+    content = Column(Text, nullable=False)
+    hit_count = Column(Integer, default=0, nullable=False)
+
+
 def init_db():
     """Initialize database tables"""
     Base.metadata.create_all(bind=engine)
@@ -1,8 +1,13 @@
-from fastapi import FastAPI, UploadFile, File, Depends, HTTPException
+from fastapi import FastAPI, UploadFile, File, Depends, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 import os
+import json
+import time
+import asyncio
 import logging
+from typing import Optional
 from dotenv import load_dotenv
 
 # Configure logging
@@ -20,16 +25,52 @@ from schemas import (
     User,
     GenerateTopicContentRequest,
     GenerateTopicContentResponse,
+    TopicLibraryPrewarmRequest,
+    TopicLibraryPrewarmResponse,
+    BulkAnalyzeRequest,
+    ReplanRoadmapRequest,
+    ReplanRoadmapResponse,
+    BulkJobResponse,
     PanicModeRequest,
     PanicModeResponse
 )
 from database import init_db, get_db, UserModel
-from services.gemini_service import analyze_gap_with_gemini, generate_topic_content_with_gemini
+from services.gemini_service import (
+    analyze_gap_with_gemini,
+    generate_topic_content_with_gemini,
+    prewarm_topic_library,
+    stream_topic_content_with_gemini,
+    stream_panic_mode_with_gemini,
+    model_router
+)
+from services.topic_library import topic_library
+from services.bulk_service import BulkJobLimitReached, run_bulk, bulk_jobs, to_ndjson_line
+from services.roadmap_service import replan_roadmap
 from services.file_service import extract_text_from_file
+from services.result_cache import CachedResult, result_cache, make_cache_key
+from services.token_budget import get_budget_stats
+from services.scheduler import DeadlineExceeded, llm_scheduler, scheduling
+from services.roadmap_salvage import get_salvage_stats
+from responses import (
+    FastJSONResponse,
+    CompressionMiddleware,
+    cached_result_response,
+    serialize_json,
+    sse_event,
+    SSE_HEADERS
+)
 
 load_dotenv()
 
-app = FastAPI(title="JobPrep API", version="1.0.0")
+app = FastAPI(title="JobPrep API", version="1.0.0", default_response_class=FastJSONResponse)
+
+# Response compression (brotli/gzip) for large roadmap and markdown bodies
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(os.getenv("COMPRESSION_MIN_SIZE", "1024")),
+    # Streamed responses must reach the client chunk by chunk
+    excluded_paths=["/bulk/analyze", "/generate_topic_content/stream", "/panic_mode/stream"],
+)
 
 # CORS Configuration
 FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:5173")
@@ -39,14 +80,21 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Content-Location"],
 )
 
 
 @app.on_event("startup")
-def startup_event():
+async def startup_event():
     """Initialize database on startup"""
     init_db()
     print("✅ Database initialized")
+    
+    # Optionally pre-warm the shared topic library in the background
+    prewarm_topics = [t.strip() for t in os.getenv("TOPIC_LIBRARY_PREWARM", "").split(",") if t.strip()]
+    popular_limit = int(os.getenv("TOPIC_LIBRARY_PREWARM_POPULAR", "0"))
+    if prewarm_topics or popular_limit:
+        app.state.prewarm_task = asyncio.create_task(prewarm_topic_library(prewarm_topics, popular_limit=popular_limit))
 
 
 @app.get("/")
@@ -54,28 +102,99 @@ def read_root():
     return {"message": "JobPrep API is running", "version": "1.0.0"}
 
 
+@app.get("/metrics")
+def metrics():
+    """
+    Runtime counters for caches and AI generation.
+    """
+    return {
+        "result_cache": result_cache.stats(),
+        "models": model_router.get_stats(),
+        "budgets": get_budget_stats(),
+        "topic_library": topic_library.get_stats(),
+        "scheduler": llm_scheduler.get_stats(),
+        "salvage": get_salvage_stats(),
+    }
+
+
+def request_deadline(http_request: Request) -> Optional[float]:
+    """
+    Read the optional X-Request-Deadline header (seconds the client is willing to wait).
+
+    Returns:
+        Deadline as a time.monotonic() value, or None when the header is absent
+    """
+    raw = http_request.headers.get("x-request-deadline")
+    if not raw:
+        return None
+    try:
+        seconds = float(raw)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="X-Request-Deadline must be a number of seconds")
+    return time.monotonic() + seconds
+
+
+def wants_fresh_result(http_request: Request) -> bool:
+    """True if the client sent "Cache-Control: no-cache", e.g. from a Regenerate button."""
+    cache_control = http_request.headers.get("cache-control", "")
+    return "no-cache" in cache_control.lower()
+
+
+def lookup_cached_result(cache_key: str, http_request: Request) -> Optional[CachedResult]:
+    """
+    Return the cached result for a generation request, unless the client asked for a
+    fresh one. A regenerated result replaces the cached entry.
+    """
+    if wants_fresh_result(http_request):
+        return None
+    return result_cache.get(cache_key)
+
+
+@app.get("/results/{cache_key}")
+def get_result(cache_key: str, request: Request):
+    """
+    Fetch a previously generated result. Supports conditional GET via If-None-Match.
+    """
+    cached = result_cache.get(cache_key)
+    if cached is None:
+        raise HTTPException(status_code=404, detail="Result not found or expired")
+    return cached_result_response(cache_key, cached, request)
+
+
 @app.post("/analyze_gap", response_model=AnalyzeGapResponse)
-async def analyze_gap(request: AnalyzeGapRequest):
+async def analyze_gap(request: AnalyzeGapRequest, http_request: Request):
     """
     Analyze the gap between resume and job description.
     Returns match percentage, critical gaps, and a daily roadmap.
     """
+    deadline = request_deadline(http_request)
     try:
         logger.info(f"[API] /analyze_gap - Mode: {request.interview_mode}, Days: {request.preparation_days}")
         logger.debug(f"[API] Request params - Interviewer: {request.interviewer_type}, Learning: {request.learning_style}")
         
-        result = await analyze_gap_with_gemini(
-            resume_text=request.resume_text,
-            jd_text=request.jd_text,
-            preparation_days=request.preparation_days,
-            interview_mode=request.interview_mode,
-            interviewer_type=request.interviewer_type,
-            learning_style=request.learning_style or "theory_code"
-        )
+        cache_key = make_cache_key("analyze_gap", request.model_dump())
+        cached = lookup_cached_result(cache_key, http_request)
+        if cached is not None:
+            logger.info("[API] ✅ Serving roadmap from result cache")
+            return cached_result_response(cache_key, cached)
+        
+        with scheduling(deadline=deadline):
+            result = await analyze_gap_with_gemini(
+                resume_text=request.resume_text,
+                jd_text=request.jd_text,
+                preparation_days=request.preparation_days,
+                interview_mode=request.interview_mode,
+                interviewer_type=request.interviewer_type,
+                learning_style=request.learning_style or "theory_code"
+            )
         
         logger.info(f"[API] ✅ Successfully generated roadmap with {len(result.daily_roadmap)} days")
-        return result
+        cached = result_cache.put(cache_key, serialize_json(result))
+        return cached_result_response(cache_key, cached)
         
+    except DeadlineExceeded as e:
+        logger.error(f"[API] ❌ Deadline exceeded: {str(e)}")
+        raise HTTPException(status_code=504, detail=f"Request deadline exceeded: {str(e)}")
     except ValueError as e:
         # Client errors (JSON parsing, validation)
         logger.error(f"[API] ❌ Validation error: {str(e)}")
@@ -86,6 +205,40 @@ async def analyze_gap(request: AnalyzeGapRequest):
         raise HTTPException(status_code=500, detail=f"Error analyzing gap: {str(e)}")
 
 
+@app.post("/replan_roadmap", response_model=ReplanRoadmapResponse)
+async def replan(request: ReplanRoadmapRequest, http_request: Request):
+    """
+    Update an existing roadmap after a change of preparation_days or interviewer type,
+    or after finishing some days. Reuses the gap analysis and completed days and returns
+    only the delta: kept, removed and regenerated days.
+    """
+    deadline = request_deadline(http_request)
+    try:
+        logger.info(f"[API] /replan_roadmap - Current days: {len(request.roadmap.daily_roadmap)}, Requested: {request.preparation_days}")
+        
+        cache_key = make_cache_key("replan_roadmap", request.model_dump())
+        cached = lookup_cached_result(cache_key, http_request)
+        if cached is not None:
+            return cached_result_response(cache_key, cached)
+        
+        with scheduling(deadline=deadline):
+            result = await replan_roadmap(request)
+        
+        logger.info(f"[API] ✅ Regenerated {len(result.regenerated_days)} of {result.preparation_days} days")
+        cached = result_cache.put(cache_key, serialize_json(result))
+        return cached_result_response(cache_key, cached)
+        
+    except DeadlineExceeded as e:
+        logger.error(f"[API] ❌ Deadline exceeded: {str(e)}")
+        raise HTTPException(status_code=504, detail=f"Request deadline exceeded: {str(e)}")
+    except ValueError as e:
+        logger.error(f"[API] ❌ Validation error: {str(e)}")
+        raise HTTPException(status_code=422, detail=f"Invalid response from AI: {str(e)}")
+    except Exception as e:
+        logger.error(f"[API] ❌ Server error: {type(e).__name__}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error replanning roadmap: {str(e)}")
+
+
 @app.post("/parse_file", response_model=PDFUploadResponse)
 async def parse_file(file: UploadFile = File(...)):
     """
@@ -146,44 +299,220 @@ def get_user(google_id: str, db: Session = Depends(get_db)):
 
 
 @app.post("/generate_topic_content", response_model=GenerateTopicContentResponse)
-async def generate_topic_content(request: GenerateTopicContentRequest):
+async def generate_topic_content(request: GenerateTopicContentRequest, http_request: Request):
     """
     Generate AI-powered learning content for a specific topic based on user's learning style.
     """
+    deadline = request_deadline(http_request)
     try:
-        content = await generate_topic_content_with_gemini(
-            resume_text=request.resume_text,
-            jd_text=request.jd_text,
-            topic=request.topic,
+        cache_key = make_cache_key("generate_topic_content", request.model_dump())
+        cached = lookup_cached_result(cache_key, http_request)
+        if cached is not None:
+            return cached_result_response(cache_key, cached)
+        
+        with scheduling(deadline=deadline):
+            content = await generate_topic_content_with_gemini(
+                resume_text=request.resume_text,
+                jd_text=request.jd_text,
+                topic=request.topic,
+                task_type=request.task_type,
+                learning_style=request.learning_style,
+                gap_analysis=request.gap_analysis,
+                regenerate=wants_fresh_result(http_request)
+            )
+        cached = result_cache.put(cache_key, serialize_json(GenerateTopicContentResponse(content=content)))
+        return cached_result_response(cache_key, cached)
+    except DeadlineExceeded as e:
+        logger.error(f"[API] ❌ Deadline exceeded: {str(e)}")
+        raise HTTPException(status_code=504, detail=f"Request deadline exceeded: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating content: {str(e)}")
+
+
+@app.post("/generate_topic_content/stream")
+async def generate_topic_content_stream(request: GenerateTopicContentRequest, http_request: Request):
+    """
+    Stream topic content as Server-Sent Events.
+    "delta" events carry markdown chunks; "done" carries the cache key of the complete result.
+    """
+    deadline = request_deadline(http_request)
+    cache_key = make_cache_key("generate_topic_content", request.model_dump())
+    
+    async def events():
+        cached = lookup_cached_result(cache_key, http_request)
+        if cached is not None:
+            yield sse_event("delta", {"text": json.loads(cached.body)["content"]})
+            yield sse_event("done", {"cache_key": cache_key, "etag": cached.etag})
+            return
+        
+        parts = []
+        try:
+            with scheduling(deadline=deadline):
+                async for text in stream_topic_content_with_gemini(
+                    resume_text=request.resume_text,
+                    jd_text=request.jd_text,
+                    topic=request.topic,
+                    task_type=request.task_type,
+                    learning_style=request.learning_style,
+                    gap_analysis=request.gap_analysis,
+                    regenerate=wants_fresh_result(http_request)
+                ):
+                    parts.append(text)
+                    yield sse_event("delta", {"text": text})
+        except DeadlineExceeded as e:
+            logger.error(f"[API] ❌ Topic stream deadline exceeded: {str(e)}")
+            yield sse_event("error", {"detail": f"Request deadline exceeded: {str(e)}"})
+            return
+        except Exception as e:
+            logger.error(f"[API] ❌ Topic stream failed: {type(e).__name__}: {str(e)}")
+            yield sse_event("error", {"detail": f"Error generating content: {str(e)}"})
+            return
+        
+        content = "".join(parts).strip()
+        cached = result_cache.put(cache_key, serialize_json(GenerateTopicContentResponse(content=content)))
+        yield sse_event("done", {"cache_key": cache_key, "etag": cached.etag})
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@app.post("/topic_library/prewarm", response_model=TopicLibraryPrewarmResponse)
+async def prewarm_topics(request: TopicLibraryPrewarmRequest):
+    """
+    Pre-generate shared topic content so later requests only pay for personalization.
+    """
+    try:
+        generated, already_cached = await prewarm_topic_library(
+            topics=request.topics,
             task_type=request.task_type,
             learning_style=request.learning_style,
-            gap_analysis=request.gap_analysis
+            popular_limit=request.popular_limit
         )
-        return GenerateTopicContentResponse(content=content)
+        return TopicLibraryPrewarmResponse(generated=generated, already_cached=already_cached)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error generating content: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error pre-warming topic library: {str(e)}")
 
 
 @app.post("/panic_mode", response_model=PanicModeResponse)
-async def panic_mode(request: PanicModeRequest):
+async def panic_mode(request: PanicModeRequest, http_request: Request):
     """
     Generate a last-minute interview cheat sheet with critical information.
     Focus on must-know topics, quick wins, and survival tips.
     """
+    deadline = request_deadline(http_request)
     try:
+        cache_key = make_cache_key("panic_mode", request.model_dump())
+        cached = lookup_cached_result(cache_key, http_request)
+        if cached is not None:
+            return cached_result_response(cache_key, cached)
+        
         from services.gemini_service import generate_panic_mode_with_gemini
-        result = await generate_panic_mode_with_gemini(
-            resume_text=request.resume_text,
-            jd_text=request.jd_text,
-            interview_mode=request.interview_mode,
-            interviewer_type=request.interviewer_type,
-            learning_style="theory_code"  # Default for panic mode
-        )
-        return result
+        with scheduling(deadline=deadline):
+            result = await generate_panic_mode_with_gemini(
+                resume_text=request.resume_text,
+                jd_text=request.jd_text,
+                interview_mode=request.interview_mode,
+                interviewer_type=request.interviewer_type,
+                learning_style="theory_code"  # Default for panic mode
+            )
+        cached = result_cache.put(cache_key, serialize_json(result))
+        return cached_result_response(cache_key, cached)
+    except DeadlineExceeded as e:
+        logger.error(f"[API] ❌ Deadline exceeded: {str(e)}")
+        raise HTTPException(status_code=504, detail=f"Request deadline exceeded: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating panic mode: {str(e)}")
 
 
+@app.post("/panic_mode/stream")
+async def panic_mode_stream(request: PanicModeRequest, http_request: Request):
+    """
+    Stream the panic mode cheat sheet as Server-Sent Events.
+    Each section is sent as soon as it is parsed: "critical_gaps", "quick_wins",
+    "survival_tips", "talking_points" and one "must_know_topic" event per topic,
+    followed by "done" with the cache key of the complete result.
+    """
+    deadline = request_deadline(http_request)
+    cache_key = make_cache_key("panic_mode", request.model_dump())
+    
+    async def events():
+        cached = lookup_cached_result(cache_key, http_request)
+        if cached is not None:
+            data = json.loads(cached.body)
+            for section in ("critical_gaps", "quick_wins"):
+                yield sse_event(section, data[section])
+            for topic in data["must_know_topics"]:
+                yield sse_event("must_know_topic", topic)
+            for section in ("survival_tips", "talking_points"):
+                yield sse_event(section, data[section])
+            yield sse_event("done", {"cache_key": cache_key, "etag": cached.etag})
+            return
+        
+        try:
+            with scheduling(deadline=deadline):
+                async for section, value in stream_panic_mode_with_gemini(
+                    resume_text=request.resume_text,
+                    jd_text=request.jd_text,
+                    interview_mode=request.interview_mode,
+                    interviewer_type=request.interviewer_type,
+                    learning_style="theory_code"  # Default for panic mode
+                ):
+                    if section == "complete":
+                        cached = result_cache.put(cache_key, serialize_json(value))
+                        yield sse_event("done", {"cache_key": cache_key, "etag": cached.etag})
+                    else:
+                        yield sse_event(section, value)
+        except DeadlineExceeded as e:
+            logger.error(f"[API] ❌ Panic mode stream deadline exceeded: {str(e)}")
+            yield sse_event("error", {"detail": f"Request deadline exceeded: {str(e)}"})
+            return
+        except Exception as e:
+            logger.error(f"[API] ❌ Panic mode stream failed: {type(e).__name__}: {str(e)}")
+            yield sse_event("error", {"detail": f"Error generating panic mode: {str(e)}"})
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@app.post("/bulk/analyze")
+async def bulk_analyze(request: BulkAnalyzeRequest):
+    """
+    Run analyze_gap or panic_mode for many resume/JD pairs.
+    Streams NDJSON: one line per pair as it completes, then a summary line with a preliminary ranking.
+    """
+    logger.info(f"[API] /bulk/analyze - Mode: {request.mode}, Resumes: {len(request.resumes)}, JDs: {len(request.jds)}")
+    
+    async def stream():
+        async for record in run_bulk(request):
+            yield to_ndjson_line(record)
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@app.post("/bulk/jobs", response_model=BulkJobResponse)
+async def submit_bulk_job(request: BulkAnalyzeRequest):
+    """
+    Submit a bulk request as an offline job. Poll GET /bulk/jobs/{job_id} for results.
+    """
+    try:
+        job = bulk_jobs.submit(request)
+    except BulkJobLimitReached as e:
+        logger.warning(f"[API] /bulk/jobs - Refused: {str(e)}")
+        raise HTTPException(status_code=429, detail=f"Too many bulk jobs running: {str(e)}")
+    logger.info(f"[API] /bulk/jobs - Submitted job {job.job_id} with {job.total} pairs")
+    return BulkJobResponse(job_id=job.job_id, status=job.status, total=job.total)
+
+
+@app.get("/bulk/jobs/{job_id}")
+def get_bulk_job(job_id: str):
+    """
+    Return a bulk job as NDJSON: a job status line, then every record completed so far.
+    """
+    job = bulk_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Bulk job not found")
+    body = b"".join(to_ndjson_line(record) for record in [job.header()] + job.records)
+    return Response(content=body, media_type="application/x-ndjson")
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
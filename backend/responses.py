@@ -0,0 +1,113 @@
+import json
+from typing import Any, Iterable, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+from pydantic import BaseModel
+from starlette.middleware.gzip import GZipMiddleware
+
+from services.result_cache import CachedResult
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:
+    BrotliMiddleware = None
+
+
+def serialize_json(content: Any) -> bytes:
+    """
+    Serialize a Pydantic model or plain JSON data to bytes.
+    Uses orjson when installed, falling back to the standard library encoder.
+    """
+    if isinstance(content, BaseModel):
+        content = content.model_dump(mode="json")
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def sse_event(event: str, data: Any) -> bytes:
+    """Format one Server-Sent Event with a JSON payload."""
+    return b"event: " + event.encode("utf-8") + b"\ndata: " + serialize_json(data) + b"\n\n"
+
+
+# Headers that keep proxies from buffering event streams
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+class FastJSONResponse(Response):
+    """Default JSON response class backed by serialize_json()."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, (bytes, bytearray)):
+            return bytes(content)
+        return serialize_json(content)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against an ETag (weak comparison, as RFC 9110 requires).
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque_tag = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque_tag:
+            return True
+    return False
+
+
+def cached_result_response(cache_key: str, cached: CachedResult, request: Optional[Request] = None) -> Response:
+    """
+    Build a response from a pre-serialized cached result.
+
+    Args:
+        cache_key: Key the result is stored under, exposed via Content-Location
+        cached: The cached body and its ETag
+        request: When given (GET requests), If-None-Match is honored with a 304
+
+    Returns:
+        200 response with the stored bytes, or an empty 304
+    """
+    headers = {
+        "ETag": cached.etag,
+        "Cache-Control": "private, no-cache",
+        "Content-Location": f"/results/{cache_key}",
+    }
+    if request is not None and etag_matches(request.headers.get("if-none-match"), cached.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
+
+class CompressionMiddleware:
+    """
+    Negotiate brotli (when brotli-asgi is installed) or gzip for responses above minimum_size.
+    Paths starting with one of excluded_paths are passed through untouched, so streamed
+    responses are flushed to the client as they are produced.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, excluded_paths: Iterable[str] = ()):
+        self.app = app
+        self.excluded_paths = tuple(excluded_paths)
+        if BrotliMiddleware is not None:
+            self.compressed_app = BrotliMiddleware(app, minimum_size=minimum_size, gzip_fallback=True)
+        else:
+            self.compressed_app = GZipMiddleware(app, minimum_size=minimum_size)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and not scope["path"].startswith(self.excluded_paths):
+            await self.compressed_app(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
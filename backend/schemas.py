@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Literal, Optional
 
 
 class AnalyzeGapRequest(BaseModel):
@@ -38,6 +38,29 @@ class AnalyzeGapResponse(BaseModel):
     summary: str
 
 
+class RoadmapDaysResponse(BaseModel):
+    daily_roadmap: List[DayRoadmap]
+
+
+class ReplanRoadmapRequest(BaseModel):
+    resume_text: str = Field(..., min_length=10, description="Resume text content")
+    jd_text: str = Field(..., min_length=10, description="Job description text content")
+    roadmap: AnalyzeGapResponse = Field(..., description="Existing roadmap, with task completion state")
+    preparation_days: Optional[int] = Field(default=None, ge=1, le=30, description="New number of days; omit to keep the current length")
+    completed_days: List[int] = Field(default_factory=list, description="Days to keep as done (days whose tasks are all completed are kept too)")
+    interview_mode: str = Field(default="interview", description="Mode: 'learn' or 'interview'")
+    interviewer_type: Optional[str] = Field(default="technical", description="Interviewer type to plan the remaining days for")
+    previous_interviewer_type: Optional[str] = Field(default=None, description="Interviewer type the roadmap was built for; a difference regenerates all remaining days")
+    learning_style: Optional[str] = Field(default="theory_code", description="For 'learn' mode: 'project' or 'theory_code'")
+
+
+class ReplanRoadmapResponse(BaseModel):
+    preparation_days: int
+    kept_days: List[int]
+    removed_days: List[int]
+    regenerated_days: List[DayRoadmap]
+
+
 class PDFUploadResponse(BaseModel):
     text: str
     page_count: int
@@ -72,6 +95,22 @@ class GenerateTopicContentResponse(BaseModel):
     content: str
 
 
+# Each topic is one base content generation
+PREWARM_MAX_TOPICS = 50
+
+
+class TopicLibraryPrewarmRequest(BaseModel):
+    topics: List[str] = Field(default_factory=list, max_length=PREWARM_MAX_TOPICS, description="Topics to warm for the given task type and learning style")
+    task_type: str = "Read"
+    learning_style: str = "balanced"
+    popular_limit: int = Field(default=0, ge=0, le=100, description="Also warm the N most requested topics for every learning style")
+
+
+class TopicLibraryPrewarmResponse(BaseModel):
+    generated: int
+    already_cached: int
+
+
 class PanicModeRequest(BaseModel):
     resume_text: str = Field(..., min_length=10, description="Resume text content")
     jd_text: str = Field(..., min_length=10, description="Job description text content")
@@ -91,3 +130,33 @@ class PanicModeResponse(BaseModel):
     must_know_topics: List[MustKnowTopic]
     survival_tips: List[str]
     talking_points: List[str]
+
+
+# Upper bound on resume x JD pairs in one bulk request
+BULK_MAX_PAIRS = 200
+
+
+class BulkAnalyzeRequest(BaseModel):
+    mode: Literal["analyze_gap", "panic_mode"] = Field(default="analyze_gap", description="Generation to run for each resume/JD pair")
+    resumes: List[str] = Field(..., min_length=1, description="Resume texts (one resume against many JDs, or a cohort)")
+    jds: List[str] = Field(..., min_length=1, description="Job description texts")
+    preparation_days: int = Field(default=7, ge=1, le=30, description="Roadmap length for 'analyze_gap' mode")
+    interview_mode: str = "interview"
+    interviewer_type: Optional[str] = "technical"
+    learning_style: Optional[str] = "theory_code"
+
+    @model_validator(mode="after")
+    def check_pair_count(self):
+        pairs = len(self.resumes) * len(self.jds)
+        if pairs > BULK_MAX_PAIRS:
+            raise ValueError(f"Bulk request has {pairs} resume/JD pairs; the maximum is {BULK_MAX_PAIRS}")
+        for text in self.resumes + self.jds:
+            if len(text.strip()) < 10:
+                raise ValueError("Every resume and job description must be at least 10 characters")
+        return self
+
+
+class BulkJobResponse(BaseModel):
+    job_id: str
+    status: str
+    total: int
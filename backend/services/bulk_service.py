@@ -0,0 +1,279 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, List, Optional
+
+from schemas import AnalyzeGapRequest, BulkAnalyzeRequest, PanicModeRequest
+from services.gemini_service import analyze_gap_with_gemini, generate_panic_mode_with_gemini
+from services.result_cache import result_cache, make_cache_key
+from services.scheduler import Priority, scheduling
+from responses import serialize_json
+
+logger = logging.getLogger(__name__)
+
+BULK_MAX_CONCURRENCY = int(os.getenv("BULK_MAX_CONCURRENCY", "4"))
+BULK_MAX_JOBS = int(os.getenv("BULK_MAX_JOBS", "100"))
+
+
+class BulkJobLimitReached(Exception):
+    """Raised when a bulk job is submitted while BULK_MAX_JOBS jobs are still running."""
+
+
+@dataclass
+class BulkItem:
+    index: int
+    resume_text: str
+    jd_text: str
+    resume_indices: List[int]
+    jd_indices: List[int]
+
+
+def _dedupe(texts: List[str]) -> tuple[List[str], List[List[int]]]:
+    """
+    Collapse identical inputs (ignoring surrounding whitespace).
+
+    Returns:
+        Tuple of (unique texts, original indices for each unique text)
+    """
+    unique: List[str] = []
+    indices: List[List[int]] = []
+    seen: Dict[str, int] = {}
+    for i, text in enumerate(texts):
+        digest = hashlib.sha256(text.strip().encode("utf-8")).hexdigest()
+        if digest in seen:
+            indices[seen[digest]].append(i)
+            continue
+        seen[digest] = len(unique)
+        unique.append(text.strip())
+        indices.append([i])
+    return unique, indices
+
+
+def build_bulk_items(resumes: List[str], jds: List[str]) -> tuple[List[BulkItem], int]:
+    """
+    Pair every unique resume with every unique job description.
+
+    Returns:
+        Tuple of (items, number of duplicate pairs removed)
+    """
+    unique_resumes, resume_indices = _dedupe(resumes)
+    unique_jds, jd_indices = _dedupe(jds)
+    items = []
+    for r, resume_text in enumerate(unique_resumes):
+        for j, jd_text in enumerate(unique_jds):
+            items.append(BulkItem(
+                index=len(items),
+                resume_text=resume_text,
+                jd_text=jd_text,
+                resume_indices=resume_indices[r],
+                jd_indices=jd_indices[j],
+            ))
+    duplicates_removed = len(resumes) * len(jds) - len(items)
+    return items, duplicates_removed
+
+
+def preliminary_score(mode: str, result: dict) -> int:
+    """
+    Cheap 0-100 fit score used to rank bulk results before anyone reads them.
+    Critical gaps weigh most; partial skills (roadmaps) or quick wins (panic mode) adjust.
+    """
+    if mode == "panic_mode":
+        score = 100 - 15 * len(result.get("critical_gaps", [])) + 5 * len(result.get("quick_wins", []))
+    else:
+        gap_analysis = result.get("gap_analysis", {})
+        score = 100 - 15 * len(gap_analysis.get("critical_gaps", [])) - 5 * len(gap_analysis.get("partial_skills", []))
+    return max(0, min(100, score))
+
+
+async def _generate_item(request: BulkAnalyzeRequest, item: BulkItem) -> tuple[dict, bool]:
+    """
+    Generate (or reuse from the result cache) one resume/JD result.
+
+    Returns:
+        Tuple of (result as JSON data, served from cache)
+    """
+    if request.mode == "panic_mode":
+        single = PanicModeRequest(
+            resume_text=item.resume_text,
+            jd_text=item.jd_text,
+            interview_mode=request.interview_mode,
+            interviewer_type=request.interviewer_type,
+        )
+    else:
+        single = AnalyzeGapRequest(
+            resume_text=item.resume_text,
+            jd_text=item.jd_text,
+            preparation_days=request.preparation_days,
+            interview_mode=request.interview_mode,
+            interviewer_type=request.interviewer_type,
+            learning_style=request.learning_style,
+        )
+
+    # Same keys as the single-item endpoints, so bulk and interactive runs share results
+    cache_key = make_cache_key(request.mode, single.model_dump())
+    cached = result_cache.get(cache_key)
+    if cached is not None:
+        return json.loads(cached.body), True
+
+    if request.mode == "panic_mode":
+        result = await generate_panic_mode_with_gemini(
+            resume_text=single.resume_text,
+            jd_text=single.jd_text,
+            interview_mode=single.interview_mode,
+            interviewer_type=single.interviewer_type,
+            learning_style="theory_code"
+        )
+    else:
+        result = await analyze_gap_with_gemini(
+            resume_text=single.resume_text,
+            jd_text=single.jd_text,
+            preparation_days=single.preparation_days,
+            interview_mode=single.interview_mode,
+            interviewer_type=single.interviewer_type,
+            learning_style=single.learning_style or "theory_code"
+        )
+    result_cache.put(cache_key, serialize_json(result))
+    return result.model_dump(mode="json"), False
+
+
+async def run_bulk(request: BulkAnalyzeRequest) -> AsyncIterator[dict]:
+    """
+    Run a bulk request through a bounded worker pool.
+
+    Yields one "item" record per unique resume/JD pair as it completes,
+    then a "summary" record with the preliminary ranking.
+    """
+    items, duplicates_removed = build_bulk_items(request.resumes, request.jds)
+    semaphore = asyncio.Semaphore(BULK_MAX_CONCURRENCY)
+    logger.info(f"[BULK] Starting {request.mode} for {len(items)} pairs ({duplicates_removed} duplicates removed)")
+
+    async def worker(item: BulkItem) -> dict:
+        record = {
+            "type": "item",
+            "index": item.index,
+            "resume_indices": item.resume_indices,
+            "jd_indices": item.jd_indices,
+        }
+        async with semaphore:
+            try:
+                result, cached = await _generate_item(request, item)
+            except Exception as e:
+                logger.error(f"[BULK] ❌ Item {item.index} failed: {type(e).__name__}: {str(e)}")
+                return {**record, "status": "error", "error": str(e)}
+        return {
+            **record,
+            "status": "ok",
+            "cached": cached,
+            "preliminary_score": preliminary_score(request.mode, result),
+            "result": result,
+        }
+
+    # Workers inherit the bulk priority so interactive requests are served first
+    with scheduling(priority=Priority.BULK):
+        tasks = [asyncio.create_task(worker(item)) for item in items]
+    ranking = []
+    failed = 0
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            record = await next_done
+            if record["status"] == "ok":
+                ranking.append({
+                    "index": record["index"],
+                    "resume_indices": record["resume_indices"],
+                    "jd_indices": record["jd_indices"],
+                    "preliminary_score": record["preliminary_score"],
+                })
+            else:
+                failed += 1
+            yield record
+    finally:
+        # Client disconnected or job cancelled: stop remaining generations
+        for task in tasks:
+            task.cancel()
+
+    ranking.sort(key=lambda entry: entry["preliminary_score"], reverse=True)
+    yield {
+        "type": "summary",
+        "total": len(items),
+        "succeeded": len(items) - failed,
+        "failed": failed,
+        "duplicates_removed": duplicates_removed,
+        "ranking": ranking,
+    }
+
+
+def to_ndjson_line(record: dict) -> bytes:
+    return serialize_json(record) + b"\n"
+
+
+@dataclass
+class BulkJob:
+    job_id: str
+    total: int
+    status: str = "running"
+    created_at: float = field(default_factory=time.time)
+    records: List[dict] = field(default_factory=list)
+    task: Optional[asyncio.Task] = None
+
+    def header(self) -> dict:
+        completed = sum(1 for record in self.records if record["type"] == "item")
+        return {"type": "job", "job_id": self.job_id, "status": self.status, "completed": completed, "total": self.total}
+
+
+class BulkJobStore:
+    """
+    In-memory registry of offline bulk jobs, holding at most max_jobs jobs.
+    The oldest finished jobs are evicted first; new jobs are refused while
+    max_jobs jobs are still running.
+    """
+
+    def __init__(self, max_jobs: int = BULK_MAX_JOBS):
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, BulkJob]" = OrderedDict()
+
+    def running_count(self) -> int:
+        return sum(1 for job in self._jobs.values() if job.status == "running")
+
+    def submit(self, request: BulkAnalyzeRequest) -> BulkJob:
+        """
+        Start a bulk request as a background job.
+
+        Raises:
+            BulkJobLimitReached: If max_jobs jobs are already running
+        """
+        if self.running_count() >= self.max_jobs:
+            raise BulkJobLimitReached(f"{self.max_jobs} bulk jobs are already running")
+        items, _ = build_bulk_items(request.resumes, request.jds)
+        job = BulkJob(job_id=uuid.uuid4().hex, total=len(items))
+        job.task = asyncio.create_task(self._run(job, request))
+        self._jobs[job.job_id] = job
+        self._evict()
+        return job
+
+    async def _run(self, job: BulkJob, request: BulkAnalyzeRequest):
+        try:
+            async for record in run_bulk(request):
+                job.records.append(record)
+            job.status = "completed"
+        except Exception as e:
+            logger.error(f"[BULK] ❌ Job {job.job_id} failed: {type(e).__name__}: {str(e)}")
+            job.status = "failed"
+
+    def _evict(self):
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.max_jobs:
+                break
+            if self._jobs[job_id].status != "running":
+                del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[BulkJob]:
+        return self._jobs.get(job_id)
+
+
+bulk_jobs = BulkJobStore()
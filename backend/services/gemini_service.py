@@ -2,9 +2,17 @@ from google import genai
 from google.genai import types
 import os
 import json
+import asyncio
 import logging
+from typing import Any, AsyncIterator, Dict, List, Optional
 from dotenv import load_dotenv
-from schemas import AnalyzeGapResponse, GapAnalysis, DayRoadmap, DailyTask, PanicModeResponse, MustKnowTopic
+from schemas import AnalyzeGapResponse, GapAnalysis, DayRoadmap, DailyTask, PanicModeResponse, MustKnowTopic, RoadmapDaysResponse
+from services.model_router import ModelRouter
+from services.scheduler import DeadlineExceeded, llm_scheduler
+from services.token_budget import DEFAULT_TASKS_PER_DAY, TokenBudget, compute_budget, is_truncated, record_usage
+from services.roadmap_salvage import SalvagedRoadmap, clear_invalid_gap_references, salvage_roadmap, salvage_stats
+from services.topic_library import GeneratedContent, topic_library
+from services.json_stream import JSONStreamScanner
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -17,9 +25,15 @@ GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 if not GOOGLE_API_KEY:
     raise ValueError("GOOGLE_API_KEY not found in environment variables")
 
+# Upper word target for topic explainers (prompt and output budget)
+TOPIC_WORD_TARGET = 500
+
 # Initialize Gemini client
 client = genai.Client(api_key=GOOGLE_API_KEY)
 
+# Route each call to a model tier, queued by priority (see services/model_router.py)
+model_router = ModelRouter(client, scheduler=llm_scheduler)
+
 
 def get_interview_context(interview_mode: str = "interview", interviewer_type: str = "technical", learning_style: str = "theory_code") -> str:
     """
@@ -201,24 +215,27 @@ Return ONLY valid JSON in this exact format:
         logger.debug(f"[GEMINI] Interviewer Type: {interviewer_type}, Learning Style: {learning_style}")
         logger.debug(f"[GEMINI] Resume length: {len(resume_text)} chars, JD length: {len(jd_text)} chars")
         
-        # Configuration - increase max tokens for longer roadmaps
-        max_tokens = 16384 if preparation_days > 14 else 8192
-        logger.info(f"[GEMINI] Using max_output_tokens: {max_tokens}")
+        # Configuration - output and thinking budgets scale with the roadmap length
+        budget = compute_budget("analyze_gap", preparation_days=preparation_days)
+        logger.info(f"[GEMINI] Using max_output_tokens: {budget.max_output_tokens}, thinking_budget: {budget.thinking_budget}")
         
-        # Call Gemini API with new client
+        # Call Gemini API through the model router
         logger.info("[GEMINI] Calling Gemini API with JSON schema...")
-        response = client.models.generate_content(
-            model='gemini-2.5-flash',
+        response = await model_router.generate(
+            "analyze_gap",
+            size=preparation_days,
             contents=system_prompt,
             config=types.GenerateContentConfig(
                 temperature=0.7,
                 top_p=0.95,
                 top_k=40,
-                max_output_tokens=max_tokens,
+                max_output_tokens=budget.max_output_tokens,
+                thinking_config=types.ThinkingConfig(thinking_budget=budget.thinking_budget),
                 response_mime_type='application/json',
                 response_schema=AnalyzeGapResponse,
             )
         )
+        record_usage("analyze_gap", budget, response)
         
         # Log response metadata
         logger.info(f"[GEMINI] Response received successfully")
@@ -237,76 +254,457 @@ Return ONLY valid JSON in this exact format:
         else:
             logger.warning("[GEMINI] No usage_metadata available in response")
         
-        # Extract and parse JSON response (already validated by schema)
-        response_text = response.text.strip()
+        # Extract the JSON response; truncated or invalid parts are salvaged below
+        response_text = (response.text or "").strip()
+        truncated = is_truncated(response)
         logger.debug(f"[GEMINI] Response length: {len(response_text)} chars")
         
-        # Parse JSON (no need to clean markdown since we use response_schema)
         logger.info("[GEMINI] Parsing JSON response...")
-        result_dict = json.loads(response_text)
+        salvaged = salvage_roadmap(response_text, preparation_days)
+        salvage_stats.responses += 1
+        salvage_stats.gap_references_cleared += salvaged.cleared_gap_references
+        if truncated:
+            salvage_stats.truncated += 1
         
         # Log parsed structure
-        logger.info(f"[GEMINI] Parsed - Critical gaps: {len(result_dict.get('gap_analysis', {}).get('critical_gaps', []))}, Partial skills: {len(result_dict.get('gap_analysis', {}).get('partial_skills', []))}, Days: {len(result_dict.get('daily_roadmap', []))}")
+        gap_analysis = salvaged.gap_analysis
+        logger.info(
+            f"[GEMINI] Parsed - Critical gaps: {len(gap_analysis.critical_gaps) if gap_analysis else 'N/A'}, "
+            f"Partial skills: {len(gap_analysis.partial_skills) if gap_analysis else 'N/A'}, Days: {len(salvaged.days)}"
+        )
+        
+        if salvaged.is_complete(preparation_days):
+            logger.info(f"[GEMINI] ✅ Successfully generated {preparation_days}-day roadmap")
+            return salvaged.to_response()
         
-        # Validate and create response object
-        gap_analysis = GapAnalysis(
-            critical_gaps=result_dict["gap_analysis"]["critical_gaps"],
-            partial_skills=result_dict["gap_analysis"]["partial_skills"]
+        reason = "truncated" if truncated else "incomplete or invalid"
+        logger.warning(f"[GEMINI] ⚠️ Roadmap response was {reason}, repairing missing parts")
+        return await repair_roadmap_with_gemini(
+            salvaged,
+            resume_text=resume_text,
+            jd_text=jd_text,
+            preparation_days=preparation_days,
+            interview_mode=interview_mode,
+            interviewer_type=interviewer_type,
+            learning_style=learning_style
         )
         
-        daily_roadmap = []
-        for day_data in result_dict["daily_roadmap"]:
-            tasks = [DailyTask(**task) for task in day_data["tasks"]]
-            day_roadmap = DayRoadmap(
-                day=day_data["day"],
-                title=day_data["title"],
-                focus=day_data["focus"],
-                tasks=tasks
+    except ValueError:
+        raise
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        logger.error(f"[GEMINI] ❌ Unexpected error: {type(e).__name__}: {str(e)}")
+        raise Exception(f"Error calling Gemini API: {str(e)}")
+
+
+def parse_day_roadmap(day_data: dict) -> DayRoadmap:
+    """Build a DayRoadmap from one parsed element of "daily_roadmap"."""
+    tasks = [DailyTask(**task) for task in day_data["tasks"]]
+    return DayRoadmap(
+        day=day_data["day"],
+        title=day_data["title"],
+        focus=day_data["focus"],
+        tasks=tasks
+    )
+
+
+def format_gap_list(gaps: List[str]) -> str:
+    return "\n".join(f"  {index}. {gap}" for index, gap in enumerate(gaps)) or "  (none)"
+
+
+async def generate_roadmap_days_with_gemini(
+    resume_text: str,
+    jd_text: str,
+    gap_analysis: GapAnalysis,
+    day_numbers: List[int],
+    total_days: int,
+    existing_days: List[DayRoadmap],
+    completed_tasks: Optional[Dict[int, List[DailyTask]]] = None,
+    interview_mode: str = "interview",
+    interviewer_type: str = "technical",
+    learning_style: str = "theory_code"
+) -> List[DayRoadmap]:
+    """
+    Generate only selected days of a roadmap, reusing an existing gap analysis.
+    
+    Args:
+        resume_text: Resume text content
+        jd_text: Job description text content
+        gap_analysis: Gap analysis the tasks must reference (gap_index is relative to it)
+        day_numbers: Day numbers to generate
+        total_days: Total length of the roadmap
+        existing_days: Days that stay as they are, given to the model as context
+        completed_tasks: Already completed tasks per regenerated day; they are kept
+            at the start of that day and the model plans the rest
+    
+    Returns:
+        The generated days, ordered by day number
+    """
+    completed_tasks = completed_tasks or {}
+    mode_context = get_interview_context(interview_mode, interviewer_type, learning_style)
+    
+    existing_summary = "\n".join(
+        f"- Day {day.day}: {day.title} (focus: {day.focus})" for day in sorted(existing_days, key=lambda d: d.day)
+    ) or "- (none)"
+    carried_summary = "\n".join(
+        f"- Day {day}: " + "; ".join(task.task for task in tasks)
+        for day, tasks in sorted(completed_tasks.items()) if tasks
+    ) or "- (none)"
+    
+    system_prompt = f"""You are an expert tech recruiter and career coach updating an existing {total_days}-day study roadmap.
+
+PREPARATION CONTEXT:
+{mode_context}
+
+GAP ANALYSIS (already done, do not change it):
+Critical gaps:
+{format_gap_list(gap_analysis.critical_gaps)}
+Partial skills:
+{format_gap_list(gap_analysis.partial_skills)}
+
+DAYS THAT STAY AS THEY ARE (do not repeat their content):
+{existing_summary}
+
+TASKS ALREADY COMPLETED ON DAYS YOU ARE GENERATING (they stay; plan only the rest of that day):
+{carried_summary}
+
+Your task: generate ONLY these days: {", ".join(str(day) for day in day_numbers)}
+
+IMPORTANT: Generate all content in ENGLISH, regardless of the language used in the resume or job description.
+
+IMPORTANT RULES FOR TASKS:
+- gap_type: "critical" if addressing critical gaps, "partial" if addressing partial skills, null if general
+- gap_index: The 0-based index in the respective list above
+- Cover gaps not yet addressed by the days that stay, critical gaps first
+- Each day should have 3-5 tasks in total, counting already completed tasks
+- Task types: "Read", "Build", "Code", "Practice", "Project"
+- Include realistic time estimates
+
+Resume:
+{resume_text}
+
+Job Description:
+{jd_text}
+
+Return ONLY valid JSON: {{"daily_roadmap": [{{"day": N, "title": "...", "focus": "...", "tasks": [{{"task": "...", "type": "Read", "duration": "2 hours", "completed": false, "gap_type": "critical", "gap_index": 0}}]}}]}}"""
+
+    try:
+        logger.info(f"[GEMINI] Generating roadmap days {day_numbers} of {total_days}")
+        # Carried completed tasks count toward each day's tasks, so fewer are generated
+        carried_count = sum(len(tasks) for day, tasks in completed_tasks.items() if day in day_numbers)
+        budget = compute_budget(
+            "roadmap_days",
+            preparation_days=len(day_numbers),
+            task_count=max(len(day_numbers), len(day_numbers) * DEFAULT_TASKS_PER_DAY - carried_count)
+        )
+        response = await model_router.generate(
+            "roadmap_days",
+            size=len(day_numbers),
+            contents=system_prompt,
+            config=types.GenerateContentConfig(
+                temperature=0.7,
+                top_p=0.95,
+                top_k=40,
+                max_output_tokens=budget.max_output_tokens,
+                thinking_config=types.ThinkingConfig(thinking_budget=budget.thinking_budget),
+                response_mime_type='application/json',
+                response_schema=RoadmapDaysResponse,
             )
-            daily_roadmap.append(day_roadmap)
-        
-        logger.info(f"[GEMINI] ✅ Successfully generated {len(daily_roadmap)}-day roadmap")
-        return AnalyzeGapResponse(
-            gap_analysis=gap_analysis,
-            daily_roadmap=daily_roadmap,
-            summary=result_dict["summary"]
         )
+        record_usage("roadmap_days", budget, response)
+        
+        result_dict = json.loads(response.text.strip())
+        wanted = set(day_numbers)
+        generated = {}
+        for day_data in result_dict["daily_roadmap"]:
+            day = parse_day_roadmap(day_data)
+            if day.day in wanted and day.day not in generated:
+                salvage_stats.gap_references_cleared += clear_invalid_gap_references(day, gap_analysis)
+                for task in day.tasks:
+                    task.completed = False
+                day.tasks = completed_tasks.get(day.day, []) + day.tasks
+                generated[day.day] = day
+        
+        missing = wanted - generated.keys()
+        if missing:
+            raise ValueError(f"Gemini response is missing days {sorted(missing)}")
+        
+        logger.info(f"[GEMINI] ✅ Generated {len(generated)} roadmap days")
+        return [generated[day] for day in sorted(generated)]
         
     except json.JSONDecodeError as e:
         logger.error(f"[GEMINI] ❌ JSON Parse Error: {str(e)}")
-        logger.error(f"[GEMINI] Response text preview: {response_text[:500]}...")
         raise ValueError(f"Failed to parse Gemini response as JSON: {str(e)}")
     except KeyError as e:
-        logger.error(f"[GEMINI] ❌ Missing key in response: {str(e)}")
-        logger.error(f"[GEMINI] Available keys: {list(result_dict.keys()) if 'result_dict' in locals() else 'N/A'}")
         raise ValueError(f"Invalid response structure from Gemini: missing {str(e)}")
+    except ValueError:
+        raise
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         logger.error(f"[GEMINI] ❌ Unexpected error: {type(e).__name__}: {str(e)}")
         raise Exception(f"Error calling Gemini API: {str(e)}")
 
 
-async def generate_topic_content_with_gemini(
+async def generate_roadmap_summary_with_gemini(
+    gap_analysis: GapAnalysis,
+    daily_roadmap: List[DayRoadmap],
+    interview_mode: str = "interview",
+    interviewer_type: str = "technical",
+    learning_style: str = "theory_code"
+) -> str:
+    """
+    Write only the summary of an existing roadmap (used when it was lost or invalid).
+    
+    Returns:
+        A 2-3 sentence summary of the preparation strategy
+    """
+    mode_context = get_interview_context(interview_mode, interviewer_type, learning_style)
+    day_list = "\n".join(f"- Day {day.day}: {day.title} (focus: {day.focus})" for day in daily_roadmap)
+    
+    system_prompt = f"""You are an expert tech recruiter and career coach. Summarize this {len(daily_roadmap)}-day study roadmap.
+
+PREPARATION CONTEXT:
+{mode_context}
+
+Critical gaps:
+{format_gap_list(gap_analysis.critical_gaps)}
+Partial skills:
+{format_gap_list(gap_analysis.partial_skills)}
+
+Roadmap:
+{day_list}
+
+Write a brief 2-3 sentence summary of the preparation strategy in ENGLISH. Return only the summary text."""
+
+    try:
+        budget = compute_budget("roadmap_summary")
+        response = await model_router.generate(
+            "roadmap_summary",
+            contents=system_prompt,
+            config=types.GenerateContentConfig(
+                temperature=0.7,
+                max_output_tokens=budget.max_output_tokens,
+                thinking_config=types.ThinkingConfig(thinking_budget=budget.thinking_budget),
+            )
+        )
+        record_usage("roadmap_summary", budget, response)
+        
+        summary = (response.text or "").strip()
+        if not summary:
+            raise ValueError("Gemini returned an empty roadmap summary")
+        return summary
+        
+    except ValueError:
+        raise
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        logger.error(f"[GEMINI] ❌ Unexpected error: {type(e).__name__}: {str(e)}")
+        raise Exception(f"Error calling Gemini API: {str(e)}")
+
+
+async def repair_roadmap_with_gemini(
+    salvaged: SalvagedRoadmap,
     resume_text: str,
     jd_text: str,
+    preparation_days: int,
+    interview_mode: str = "interview",
+    interviewer_type: str = "technical",
+    learning_style: str = "theory_code"
+) -> AnalyzeGapResponse:
+    """
+    Complete a partially usable roadmap with small follow-up calls instead of a full regeneration.
+    Only the missing or invalid days are regenerated (around the salvaged ones), and the
+    summary only if it was lost.
+    
+    Args:
+        salvaged: What could be recovered from the original response
+        preparation_days: Number of days the roadmap should have
+    
+    Returns:
+        The merged roadmap
+    
+    Raises:
+        ValueError: If the gap analysis was lost or a follow-up call fails to fill the gaps
+    """
+    salvage_stats.repair_attempts += 1
+    if salvaged.gap_analysis is None:
+        # Every task references the gap analysis, so nothing else can be kept without it
+        salvage_stats.failed += 1
+        raise ValueError("Gemini response could not be salvaged: gap analysis is missing or invalid")
+    
+    missing_days = salvaged.missing_days(preparation_days)
+    logger.info(
+        f"[SALVAGE] Kept {len(salvaged.days)} of {preparation_days} days "
+        f"({salvaged.invalid_days} invalid), regenerating days {missing_days}, "
+        f"summary {'kept' if salvaged.summary is not None else 'missing'}"
+    )
+    
+    try:
+        days = dict(salvaged.days)
+        if missing_days:
+            regenerated = await generate_roadmap_days_with_gemini(
+                resume_text=resume_text,
+                jd_text=jd_text,
+                gap_analysis=salvaged.gap_analysis,
+                day_numbers=missing_days,
+                total_days=preparation_days,
+                existing_days=list(salvaged.days.values()),
+                interview_mode=interview_mode,
+                interviewer_type=interviewer_type,
+                learning_style=learning_style
+            )
+            days.update((day.day, day) for day in regenerated)
+        daily_roadmap = [days[day] for day in sorted(days)]
+        
+        summary = salvaged.summary
+        if summary is None:
+            summary = await generate_roadmap_summary_with_gemini(
+                salvaged.gap_analysis,
+                daily_roadmap,
+                interview_mode=interview_mode,
+                interviewer_type=interviewer_type,
+                learning_style=learning_style
+            )
+            salvage_stats.summaries_regenerated += 1
+    except DeadlineExceeded:
+        salvage_stats.failed += 1
+        raise
+    except Exception as e:
+        salvage_stats.failed += 1
+        logger.error(f"[SALVAGE] ❌ Repair failed: {str(e)}")
+        raise ValueError(f"Failed to repair incomplete Gemini response: {str(e)}")
+    
+    salvage_stats.repaired += 1
+    salvage_stats.days_salvaged += len(salvaged.days)
+    salvage_stats.days_regenerated += len(missing_days)
+    logger.info(f"[SALVAGE] ✅ Repaired roadmap, regenerated {len(missing_days)} of {preparation_days} days")
+    return AnalyzeGapResponse(
+        gap_analysis=salvaged.gap_analysis,
+        daily_roadmap=daily_roadmap,
+        summary=summary
+    )
+
+# Learning style instructions for topic content
+TOPIC_STYLE_INSTRUCTIONS = {
+    "practical": "Focus on hands-on examples, code snippets, real-world applications, and step-by-step tutorials. Include practical exercises.",
+    "theoretical": "Provide in-depth explanations, underlying principles, academic concepts, and comprehensive theory. Include references to documentation.",
+    "balanced": "Mix theory with practical examples, include both conceptual explanations and hands-on demonstrations."
+}
+
+# Word target for the personalized section appended to shared topic content
+PERSONALIZATION_WORD_TARGET = 120
+
+
+def build_base_topic_prompt(topic: str, task_type: str, learning_style: str) -> str:
+    """
+    Build the candidate-independent topic prompt shared by the regular and streaming generators.
+    """
+    style_instruction = TOPIC_STYLE_INSTRUCTIONS.get(learning_style, TOPIC_STYLE_INSTRUCTIONS["balanced"])
+    
+    return f"""You are an expert technical instructor helping job candidates prepare for interviews.
+
+CURRENT TOPIC: {topic}
+TASK TYPE: {task_type}
+
+LEARNING STYLE: {learning_style}
+Instructions: {style_instruction}
+
+IMPORTANT: 
+- Generate all content in ENGLISH.
+- Do NOT address the reader personally or refer to their background; this content is shared by many candidates.
+- Do not provide background information, context, or moralizing text. Output only the requested content. 
+
+Generate educational content (300-{TOPIC_WORD_TARGET} words) that:
+1. Explains the topic clearly in the context of typical job requirements
+2. Highlights what interviewers typically ask about this topic
+3. Provides actionable takeaways for interview preparation
+4. Matches the {learning_style} learning style
+
+Keep the tone encouraging and practical. Focus on interview readiness, not full mastery. Limit in 300-{TOPIC_WORD_TARGET} words. No yapping.
+"""
+
+
+def topic_content_config(budget: TokenBudget) -> types.GenerateContentConfig:
+    return types.GenerateContentConfig(
+        temperature=0.8,
+        top_p=0.95,
+        top_k=40,
+        max_output_tokens=budget.max_output_tokens,
+        thinking_config=types.ThinkingConfig(thinking_budget=budget.thinking_budget),
+    )
+
+
+async def generate_base_topic_content_with_gemini(
     topic: str,
     task_type: str,
-    learning_style: str,
+    learning_style: str
+) -> GeneratedContent:
+    """
+    Generate candidate-independent learning content for a topic.
+    The result is shared across users through the topic library, which only
+    stores it when the response was not truncated.
+    """
+    try:
+        budget = compute_budget("topic_content", word_target=TOPIC_WORD_TARGET)
+        response = await model_router.generate(
+            "topic_content",
+            contents=build_base_topic_prompt(topic, task_type, learning_style),
+            config=topic_content_config(budget)
+        )
+        record_usage("topic_content", budget, response)
+        
+        return GeneratedContent((response.text or "").strip(), truncated=is_truncated(response))
+        
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        raise Exception(f"Error generating topic content: {str(e)}")
+
+
+async def stream_base_topic_content_with_gemini(
+    topic: str,
+    task_type: str,
+    learning_style: str
+) -> AsyncIterator[GeneratedContent]:
+    """
+    Streaming variant of generate_base_topic_content_with_gemini(), yielding markdown
+    text chunks. The finish reason arrives with the last chunk, so that chunk carries
+    the truncated flag (with empty text if it had none).
+    """
+    try:
+        budget = compute_budget("topic_content", word_target=TOPIC_WORD_TARGET)
+        last_chunk = None
+        async for chunk in model_router.stream(
+            "topic_content",
+            contents=build_base_topic_prompt(topic, task_type, learning_style),
+            config=topic_content_config(budget)
+        ):
+            last_chunk = chunk
+            if chunk.text:
+                yield GeneratedContent(chunk.text)
+        if last_chunk is not None:
+            record_usage("topic_content", budget, last_chunk)
+            if is_truncated(last_chunk):
+                yield GeneratedContent("", truncated=True)
+        
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        raise Exception(f"Error generating topic content: {str(e)}")
+
+
+async def personalize_topic_content_with_gemini(
+    resume_text: str,
+    jd_text: str,
+    topic: str,
     gap_analysis: GapAnalysis
 ) -> str:
     """
-    Generate personalized learning content for a specific topic using Gemini AI.
-    Tailored to the user's learning style and background.
+    Generate a short section connecting a topic to the candidate's background and gaps.
     """
-    
-    # Create learning style instructions
-    style_instructions = {
-        "practical": "Focus on hands-on examples, code snippets, real-world applications, and step-by-step tutorials. Include practical exercises.",
-        "theoretical": "Provide in-depth explanations, underlying principles, academic concepts, and comprehensive theory. Include references to documentation.",
-        "balanced": "Mix theory with practical examples, include both conceptual explanations and hands-on demonstrations."
-    }
-    
-    style_instruction = style_instructions.get(learning_style, style_instructions["balanced"])
-    
     # Summarize user's background
     critical_gaps_summary = ", ".join(gap_analysis.critical_gaps[:3]) if gap_analysis.critical_gaps else "None identified"
     partial_skills_summary = ", ".join(gap_analysis.partial_skills[:3]) if gap_analysis.partial_skills else "None identified"
@@ -322,60 +720,142 @@ KNOWLEDGE GAPS:
 - Areas to strengthen: {partial_skills_summary}
 
 CURRENT TOPIC: {topic}
-TASK TYPE: {task_type}
 
-LEARNING STYLE: {learning_style}
-Instructions: {style_instruction}
+The candidate already has a general explainer for this topic. Write ONLY a short addendum (max {PERSONALIZATION_WORD_TARGET} words, markdown bullet points) that:
+1. Connects the topic to what the candidate already knows
+2. Points out how it relates to their gaps and this specific job
+3. Suggests one talking point they can use in the interview
 
 IMPORTANT: 
 - Generate all content in ENGLISH, regardless of the language used in the resume or job description.
+- Do NOT repeat a general explanation of the topic.
 - Do NOT start with phrases like "Great work on...", "Excellent background in...", etc.
-- Focus directly on explaining the topic without addressing the candidate personally.
-- Do not provide background information, context, or moralizing text. Output only the requested content. 
-
-Generate educational content (300-500 words) that:
-1. Explains the topic clearly in context of the job requirements
-2. Connects to what the candidate already knows
-3. Highlights what interviewers typically ask about this topic
-4. Provides actionable takeaways for interview preparation
-5. Matches the {learning_style} learning style
-
-Keep the tone encouraging and practical. Focus on interview readiness, not full mastery. Limit in 300-500 words. No yapping.
+- Output only the bullet points. No headings. No yapping.
 """
 
     try:
-        response = client.models.generate_content(
-            model='gemini-2.5-flash',
+        budget = compute_budget("topic_personalization", word_target=PERSONALIZATION_WORD_TARGET)
+        response = await model_router.generate(
+            "topic_personalization",
             contents=system_prompt,
             config=types.GenerateContentConfig(
-                temperature=0.8,
+                temperature=0.7,
                 top_p=0.95,
                 top_k=40,
-                max_output_tokens=8192,
+                max_output_tokens=budget.max_output_tokens,
+                thinking_config=types.ThinkingConfig(thinking_budget=budget.thinking_budget),
             )
         )
+        record_usage("topic_personalization", budget, response)
         
         return response.text.strip()
         
+    except DeadlineExceeded:
+        raise
     except Exception as e:
-        raise Exception(f"Error generating topic content: {str(e)}")
+        raise Exception(f"Error personalizing topic content: {str(e)}")
 
 
-async def generate_panic_mode_with_gemini(
+# Heading placed between shared base content and the personalized section
+PERSONALIZATION_HEADING = "\n\n### How This Applies to You\n\n"
+
+
+def combine_topic_content(base_content: str, personalization: str) -> str:
+    """Append the personalized section to shared base content."""
+    return f"{base_content}{PERSONALIZATION_HEADING}{personalization}"
+
+
+async def generate_topic_content_with_gemini(
+    resume_text: str,
+    jd_text: str,
+    topic: str,
+    task_type: str,
+    learning_style: str,
+    gap_analysis: GapAnalysis,
+    regenerate: bool = False
+) -> str:
+    """
+    Generate personalized learning content for a specific topic using Gemini AI.
+    Base content comes from the shared topic library; only a short personalized
+    section is generated per user. With regenerate=True the library entry is
+    generated again and replaced.
+    """
+    base_content, personalization = await asyncio.gather(
+        topic_library.get_or_generate(
+            topic, task_type, learning_style, generate_base_topic_content_with_gemini, regenerate=regenerate
+        ),
+        personalize_topic_content_with_gemini(resume_text, jd_text, topic, gap_analysis),
+    )
+    return combine_topic_content(base_content, personalization)
+
+
+async def stream_topic_content_with_gemini(
+    resume_text: str,
+    jd_text: str,
+    topic: str,
+    task_type: str,
+    learning_style: str,
+    gap_analysis: GapAnalysis,
+    regenerate: bool = False
+) -> AsyncIterator[str]:
+    """
+    Streaming variant of generate_topic_content_with_gemini(), yielding markdown chunks.
+    Library hits are yielded at once; on a miss the base content streams as it is
+    generated and is stored in the library when complete (concurrent misses share one
+    generation). The personalized section is generated concurrently and yielded last.
+    """
+    personalization = asyncio.create_task(
+        personalize_topic_content_with_gemini(resume_text, jd_text, topic, gap_analysis)
+    )
+    try:
+        async for text in topic_library.stream_or_generate(
+            topic, task_type, learning_style, stream_base_topic_content_with_gemini, regenerate=regenerate
+        ):
+            yield text
+        
+        yield PERSONALIZATION_HEADING + await personalization
+    finally:
+        personalization.cancel()
+
+
+async def prewarm_topic_library(
+    topics: List[str],
+    task_type: str = "Read",
+    learning_style: str = "balanced",
+    popular_limit: int = 0
+) -> tuple[int, int]:
+    """
+    Pre-generate shared topic content.
+    Given topics are warmed for one task type and learning style; the most popular
+    existing topics are additionally warmed for every learning style.
+    
+    Returns:
+        Tuple of (generated, already_cached)
+    """
+    entries = [(topic, task_type, learning_style) for topic in topics]
+    if popular_limit > 0:
+        popular = await asyncio.to_thread(topic_library.popular_topics, popular_limit)
+        for popular_topic, popular_task_type in popular:
+            entries.extend((popular_topic, popular_task_type, style) for style in TOPIC_STYLE_INSTRUCTIONS)
+    # Generations run at INTERACTIVE because user requests may join them; the
+    # prewarm concurrency limit is what keeps warming from crowding users out
+    return await topic_library.prewarm(entries, generate_base_topic_content_with_gemini)
+
+
+def build_panic_mode_prompt(
     resume_text: str, 
     jd_text: str,
     interview_mode: str = "interview",
     interviewer_type: str = "technical",
     learning_style: str = "theory_code"
-) -> PanicModeResponse:
+) -> str:
     """
-    Generate a last-minute interview cheat sheet for candidates with limited time.
-    Focus on critical gaps, quick wins, and survival tips.
+    Build the panic mode prompt shared by the regular and streaming generators.
     """
     # Get interview context using the reusable function
     mode_context = get_interview_context(interview_mode, interviewer_type, learning_style)
     
-    system_prompt = f"""You are an expert interview coach helping a candidate prepare for a LAST-MINUTE interview.
+    return f"""You are an expert interview coach helping a candidate prepare for a LAST-MINUTE interview.
 
 INTERVIEW CONTEXT: {mode_context}
 
@@ -413,31 +893,54 @@ Return ONLY valid JSON in this exact format:
 Keep talking points concise and interview-ready. Use markdown formatting for readability.
 """
 
+
+def panic_mode_config(budget: TokenBudget) -> types.GenerateContentConfig:
+    return types.GenerateContentConfig(
+        temperature=0.7,
+        top_p=0.95,
+        top_k=40,
+        max_output_tokens=budget.max_output_tokens,
+        thinking_config=types.ThinkingConfig(thinking_budget=budget.thinking_budget),
+        response_mime_type='application/json',
+        response_schema=PanicModeResponse,
+    )
+
+
+def parse_must_know_topic(topic: dict) -> MustKnowTopic:
+    return MustKnowTopic(
+        topic=topic["topic"],
+        why=topic.get("why", ""),
+        key_points=topic["key_points"]
+    )
+
+
+async def generate_panic_mode_with_gemini(
+    resume_text: str, 
+    jd_text: str,
+    interview_mode: str = "interview",
+    interviewer_type: str = "technical",
+    learning_style: str = "theory_code"
+) -> PanicModeResponse:
+    """
+    Generate a last-minute interview cheat sheet for candidates with limited time.
+    Focus on critical gaps, quick wins, and survival tips.
+    """
+    system_prompt = build_panic_mode_prompt(resume_text, jd_text, interview_mode, interviewer_type, learning_style)
+
     try:
-        # Call Gemini API with new client
-        response = client.models.generate_content(
-            model='gemini-2.5-flash',
+        # Call Gemini API through the model router
+        budget = compute_budget("panic_mode")
+        response = await model_router.generate(
+            "panic_mode",
             contents=system_prompt,
-            config=types.GenerateContentConfig(
-                temperature=0.7,
-                top_p=0.95,
-                top_k=40,
-                max_output_tokens=8192,
-                response_mime_type='application/json',
-                response_schema=PanicModeResponse,
-            )
+            config=panic_mode_config(budget)
         )
+        record_usage("panic_mode", budget, response)
         
         # Parse JSON (already validated by schema)
         data = json.loads(response.text.strip())
         
-        must_know_topics = [
-            MustKnowTopic(
-                topic=topic["topic"],
-                why=topic.get("why", ""),
-                key_points=topic["key_points"]
-            ) for topic in data["must_know_topics"]
-        ]
+        must_know_topics = [parse_must_know_topic(topic) for topic in data["must_know_topics"]]
         
         return PanicModeResponse(
             critical_gaps=data["critical_gaps"],
@@ -449,6 +952,59 @@ Keep talking points concise and interview-ready. Use markdown formatting for rea
         
     except json.JSONDecodeError as e:
         raise Exception(f"Failed to parse Gemini response as JSON: {str(e)}")
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         raise Exception(f"Gemini API error: {str(e)}")
 
+
+async def stream_panic_mode_with_gemini(
+    resume_text: str, 
+    jd_text: str,
+    interview_mode: str = "interview",
+    interviewer_type: str = "technical",
+    learning_style: str = "theory_code"
+) -> AsyncIterator[tuple[str, Any]]:
+    """
+    Streaming variant of generate_panic_mode_with_gemini().
+    
+    Yields:
+        (section, value) as soon as each section is parsed - "critical_gaps", "quick_wins",
+        "survival_tips" and "talking_points" as lists, and "must_know_topic" once per
+        MustKnowTopic - followed by ("complete", PanicModeResponse).
+    """
+    system_prompt = build_panic_mode_prompt(resume_text, jd_text, interview_mode, interviewer_type, learning_style)
+    budget = compute_budget("panic_mode")
+    scanner = JSONStreamScanner()
+    sections = {}
+    must_know_topics = []
+    last_chunk = None
+
+    try:
+        async for chunk in model_router.stream("panic_mode", contents=system_prompt, config=panic_mode_config(budget)):
+            last_chunk = chunk
+            for event in scanner.feed(chunk.text or ""):
+                if event[0] == "item" and event[1] == "must_know_topics":
+                    topic = parse_must_know_topic(event[3])
+                    must_know_topics.append(topic)
+                    yield "must_know_topic", topic
+                elif event[0] == "value" and event[1] != "must_know_topics":
+                    sections[event[1]] = event[2]
+                    yield event[1], event[2]
+        if last_chunk is not None:
+            record_usage("panic_mode", budget, last_chunk)
+        
+        yield "complete", PanicModeResponse(
+            critical_gaps=sections["critical_gaps"],
+            quick_wins=sections["quick_wins"],
+            must_know_topics=must_know_topics,
+            survival_tips=sections["survival_tips"],
+            talking_points=sections["talking_points"]
+        )
+        
+    except KeyError as e:
+        raise Exception(f"Incomplete panic mode stream: missing {str(e)}")
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        raise Exception(f"Gemini API error: {str(e)}")
@@ -0,0 +1,148 @@
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# ("value", key, value) when a top-level field completes,
+# ("item", key, index, value) when an element of a top-level array completes
+JSONEvent = Tuple[Any, ...]
+
+
+class JSONStreamScanner:
+    """
+    Incrementally scan a JSON object as text arrives and report every complete
+    top-level field and every complete element of a top-level array.
+
+    Works on truncated input: anything finished before the cut is still reported.
+
+    Example:
+        scanner = JSONStreamScanner()
+        scanner.feed('{"a": [1, {"b": 2}')  # -> [("item", "a", 0, 1), ("item", "a", 1, {"b": 2})]
+        scanner.feed('], "c": "x"}')        # -> [("value", "a", [1, {"b": 2}]), ("value", "c", "x")]
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0
+        self.stack: List[str] = []
+        self.in_string = False
+        self.escape = False
+        self.string_start = 0
+        self.expecting_key = False
+        self.current_key: Optional[str] = None
+        self.value_start: Optional[int] = None  # start of the current top-level value
+        self.item_start: Optional[int] = None  # start of the current top-level array element
+        self.item_counts: Dict[str, int] = {}
+        self.done = False
+
+    def feed(self, text: str) -> List[JSONEvent]:
+        """Append text and return the events completed by it."""
+        self.buffer += text
+        events: List[JSONEvent] = []
+        while self.pos < len(self.buffer) and not self.done:
+            self._step(self.buffer[self.pos], self.pos, events)
+            self.pos += 1
+        return events
+
+    def _in_top_level_array(self) -> bool:
+        return len(self.stack) == 2 and self.stack[1] == "["
+
+    def _emit_value(self, end: int, events: List[JSONEvent]):
+        ok, value = self._decode(self.buffer[self.value_start:end])
+        if ok and self.current_key is not None:
+            events.append(("value", self.current_key, value))
+        self.value_start = None
+
+    def _emit_item(self, end: int, events: List[JSONEvent]):
+        ok, value = self._decode(self.buffer[self.item_start:end])
+        if ok and self.current_key is not None:
+            index = self.item_counts.get(self.current_key, 0)
+            self.item_counts[self.current_key] = index + 1
+            events.append(("item", self.current_key, index, value))
+        self.item_start = None
+
+    @staticmethod
+    def _decode(text: str) -> Tuple[bool, Any]:
+        try:
+            return True, json.loads(text)
+        except json.JSONDecodeError:
+            logger.debug(f"[JSON] Skipping undecodable fragment: {text[:80]}")
+            return False, None
+
+    def _step(self, char: str, i: int, events: List[JSONEvent]):
+        depth = len(self.stack)
+
+        if self.in_string:
+            if self.escape:
+                self.escape = False
+            elif char == "\\":
+                self.escape = True
+            elif char == '"':
+                self.in_string = False
+                if depth == 1 and self.expecting_key:
+                    self.current_key = json.loads(self.buffer[self.string_start:i + 1])
+                    self.expecting_key = False
+                elif depth == 1:
+                    self._emit_value(i + 1, events)
+                elif self._in_top_level_array() and self.item_start == self.string_start:
+                    self._emit_item(i + 1, events)
+            return
+
+        if char in " \t\r\n":
+            return
+
+        if char == '"':
+            self.in_string = True
+            self.string_start = i
+            if depth == 1 and not self.expecting_key:
+                self.value_start = i
+            elif self._in_top_level_array() and self.item_start is None:
+                self.item_start = i
+            return
+
+        if char in "{[":
+            if depth == 0:
+                self.expecting_key = char == "{"
+            elif depth == 1:
+                self.value_start = i
+            elif self._in_top_level_array() and self.item_start is None:
+                self.item_start = i
+            self.stack.append(char)
+            return
+
+        if char in "}]":
+            if depth == 0:
+                return
+            # Close a pending scalar (number/true/false/null) first
+            if depth == 1 and self.value_start is not None:
+                self._emit_value(i, events)
+            elif self._in_top_level_array() and self.item_start is not None and self.buffer[self.item_start] not in "{[":
+                self._emit_item(i, events)
+            self.stack.pop()
+            depth = len(self.stack)
+            if depth == 0:
+                self.done = True
+            elif depth == 1:
+                self._emit_value(i + 1, events)
+            elif self._in_top_level_array() and self.item_start is not None:
+                self._emit_item(i + 1, events)
+            return
+
+        if char == ",":
+            if depth == 1:
+                if self.value_start is not None:
+                    self._emit_value(i, events)
+                self.expecting_key = True
+            elif self._in_top_level_array() and self.item_start is not None:
+                self._emit_item(i, events)
+            return
+
+        if char == ":":
+            return
+
+        # Start of a scalar literal
+        if depth == 1 and self.value_start is None and not self.expecting_key:
+            self.value_start = i
+        elif self._in_top_level_array() and self.item_start is None:
+            self.item_start = i
@@ -0,0 +1,374 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional
+
+import httpx
+from google.genai import types
+
+from services.scheduler import DeadlineExceeded, LLMScheduler, Priority, current_scheduling
+from services.token_budget import clamp_thinking_budget
+
+logger = logging.getLogger(__name__)
+
+# Tiers are ordered from cheapest/fastest to largest
+TIER_ORDER = ["fast", "standard", "large"]
+
+DEFAULT_MODEL_TIERS = {
+    "fast": os.getenv("GEMINI_MODEL_FAST", "gemini-2.5-flash-lite"),
+    "standard": os.getenv("GEMINI_MODEL_STANDARD", "gemini-2.5-flash"),
+    "large": os.getenv("GEMINI_MODEL_LARGE", "gemini-2.5-pro"),
+}
+
+DEFAULT_TIER_TIMEOUTS = {
+    "fast": float(os.getenv("GEMINI_TIMEOUT_FAST", "30")),
+    "standard": float(os.getenv("GEMINI_TIMEOUT_STANDARD", "90")),
+    "large": float(os.getenv("GEMINI_TIMEOUT_LARGE", "180")),
+}
+
+# Per endpoint: list of [max_size, tier] rules, first match wins (null max_size matches everything).
+# "size" is the number of roadmap days to generate and 0 for single-shot endpoints.
+DEFAULT_ROUTING_POLICY = {
+    "topic_content": [[None, "fast"]],
+    "topic_personalization": [[None, "fast"]],
+    "panic_mode": [[None, "fast"]],
+    "roadmap_summary": [[None, "fast"]],
+    "analyze_gap": [[14, "standard"], [None, "large"]],
+    "roadmap_days": [[14, "standard"], [None, "large"]],
+}
+
+# Scheduling class per endpoint unless the caller sets one (see services/scheduler.py)
+ENDPOINT_PRIORITIES = {
+    "panic_mode": Priority.PANIC,
+}
+
+# HTTP status codes that mean "try another model": rate limited, overloaded or unavailable
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# The SDK aborts the HTTP request at the tier timeout; the asyncio timeout is only a
+# backstop, so it waits a little longer for the SDK's own timeout to surface
+TIMEOUT_GRACE_SECONDS = 5
+
+# Timeouts raised by asyncio (backstop) or by the SDK's HTTP client
+TIMEOUT_ERRORS = (asyncio.TimeoutError, httpx.TimeoutException)
+
+# Routing health thresholds
+ERROR_RATE_THRESHOLD = 0.5
+MIN_SAMPLES_FOR_HEALTH = 5
+OVERLOAD_COOLDOWN_SECONDS = 30
+
+
+def load_routing_policy() -> Dict[str, List[list]]:
+    """
+    Load the routing policy, applying per-endpoint overrides from GEMINI_ROUTING_POLICY (JSON).
+    """
+    policy = dict(DEFAULT_ROUTING_POLICY)
+    raw = os.getenv("GEMINI_ROUTING_POLICY")
+    if raw:
+        try:
+            policy.update(json.loads(raw))
+        except json.JSONDecodeError as e:
+            logger.error(f"[ROUTER] ❌ Ignoring invalid GEMINI_ROUTING_POLICY: {str(e)}")
+    return policy
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """Timeouts and overload/availability errors are retried on another tier."""
+    if isinstance(error, TIMEOUT_ERRORS):
+        return True
+    return getattr(error, "code", None) in RETRYABLE_STATUS_CODES
+
+
+class ModelStats:
+    """Rolling latency and error statistics for one model."""
+
+    def __init__(self, window: int = 20):
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.ewma_latency: Optional[float] = None
+        self.recent = deque(maxlen=window)  # True for success, False for failure
+        self.cooldown_until = 0.0
+
+    def record_success(self, latency: float):
+        self.calls += 1
+        self.recent.append(True)
+        self.ewma_latency = latency if self.ewma_latency is None else 0.8 * self.ewma_latency + 0.2 * latency
+
+    def record_failure(self, error: Exception):
+        self.calls += 1
+        self.errors += 1
+        self.recent.append(False)
+        if isinstance(error, TIMEOUT_ERRORS):
+            self.timeouts += 1
+        elif getattr(error, "code", None) in (429, 503):
+            self.cooldown_until = time.monotonic() + OVERLOAD_COOLDOWN_SECONDS
+
+    @property
+    def error_rate(self) -> float:
+        if not self.recent:
+            return 0.0
+        return self.recent.count(False) / len(self.recent)
+
+    def is_healthy(self) -> bool:
+        if time.monotonic() < self.cooldown_until:
+            return False
+        return len(self.recent) < MIN_SAMPLES_FOR_HEALTH or self.error_rate < ERROR_RATE_THRESHOLD
+
+    def to_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "error_rate": round(self.error_rate, 3),
+            "ewma_latency_seconds": round(self.ewma_latency, 3) if self.ewma_latency is not None else None,
+            "healthy": self.is_healthy(),
+        }
+
+
+def config_for_model(config: Any, model: str, timeout: Optional[float] = None) -> Any:
+    """
+    Return a copy of config whose thinking budget is valid for the given model.
+    When the budget is raised to the model's minimum, max_output_tokens grows with it.
+
+    Args:
+        config: GenerateContentConfig for the call
+        model: Model the call is sent to
+        timeout: Seconds after which the SDK aborts the HTTP request, so a call that
+            timed out does not keep running (and billing) in its worker thread
+    """
+    updates = {}
+    thinking_config = getattr(config, "thinking_config", None)
+    if thinking_config is not None and thinking_config.thinking_budget is not None:
+        clamped = clamp_thinking_budget(model, thinking_config.thinking_budget)
+        if clamped != thinking_config.thinking_budget:
+            updates["thinking_config"] = thinking_config.model_copy(update={"thinking_budget": clamped})
+            # Thinking counts against max_output_tokens; keep the answer's share when clamping up
+            raised_by = clamped - thinking_config.thinking_budget
+            if raised_by > 0 and config.max_output_tokens is not None:
+                updates["max_output_tokens"] = config.max_output_tokens + raised_by
+    if timeout is not None:
+        timeout_ms = max(1, math.ceil(timeout * 1000))  # HttpOptions.timeout is in milliseconds
+        http_options = config.http_options or types.HttpOptions()
+        updates["http_options"] = http_options.model_copy(update={"timeout": timeout_ms})
+    if not updates:
+        return config
+    return config.model_copy(update=updates)
+
+
+async def iterate_in_thread(factory: Callable[[], Iterable[Any]]) -> AsyncIterator[Any]:
+    """
+    Consume a blocking iterator (e.g. generate_content_stream) in a worker thread
+    and yield its items on the event loop as they arrive.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    finished = object()
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for item in factory():
+                if stop.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, (item, None))
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, (finished, e))
+            return
+        loop.call_soon_threadsafe(queue.put_nowait, (finished, None))
+
+    loop.run_in_executor(None, produce)
+    try:
+        while True:
+            item, error = await queue.get()
+            if item is finished:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
+
+
+class ModelRouter:
+    """
+    Route generation calls to a Gemini model tier by endpoint and input size,
+    falling back to other tiers on timeouts or overload.
+
+    The client only needs `models.generate_content(model=, contents=, config=)` (and
+    `models.generate_content_stream` for streaming), so any stub with that shape can be
+    injected for testing. When a scheduler is given, every call first waits for a
+    slot in its priority class.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        model_tiers: Optional[Dict[str, str]] = None,
+        tier_timeouts: Optional[Dict[str, float]] = None,
+        policy: Optional[Dict[str, List[list]]] = None,
+        scheduler: Optional[LLMScheduler] = None,
+    ):
+        self.client = client
+        self.scheduler = scheduler
+        self.model_tiers = model_tiers or dict(DEFAULT_MODEL_TIERS)
+        self.tier_timeouts = tier_timeouts or dict(DEFAULT_TIER_TIMEOUTS)
+        self.policy = policy or load_routing_policy()
+        self.stats: Dict[str, ModelStats] = {tier: ModelStats() for tier in self.model_tiers}
+
+    def select_tier(self, endpoint: str, size: int = 0) -> str:
+        """Return the policy tier for an endpoint and input size."""
+        for max_size, tier in self.policy.get(endpoint, [[None, "standard"]]):
+            if max_size is None or size <= max_size:
+                return tier
+        return "standard"
+
+    def candidate_tiers(self, endpoint: str, size: int = 0) -> List[str]:
+        """
+        Order tiers to try: the policy tier first if healthy, then the rest
+        by health and observed latency.
+        """
+        primary = self.select_tier(endpoint, size)
+
+        def sort_key(tier: str):
+            stats = self.stats[tier]
+            latency = stats.ewma_latency if stats.ewma_latency is not None else self.tier_timeouts[tier]
+            return (not stats.is_healthy(), latency)
+
+        fallbacks = sorted((t for t in TIER_ORDER if t in self.model_tiers and t != primary), key=sort_key)
+        if self.stats[primary].is_healthy():
+            return [primary] + fallbacks
+        logger.warning(f"[ROUTER] Tier '{primary}' is unhealthy, preferring fallbacks for {endpoint}")
+        return sorted([primary] + fallbacks, key=sort_key)
+
+    def _slot(self, endpoint: str, size: int):
+        """Scheduler slot for a call, using the caller's scheduling context."""
+        if self.scheduler is None:
+            return nullcontext()
+        context = current_scheduling.get()
+        priority = context.priority if context.priority is not None else ENDPOINT_PRIORITIES.get(endpoint, Priority.INTERACTIVE)
+        expected_seconds = self.stats[self.select_tier(endpoint, size)].ewma_latency or 0
+        return self.scheduler.slot(priority, context.deadline, expected_seconds)
+
+    def _call_timeout(self, tier: str) -> float:
+        """Tier timeout, shortened to the caller's deadline."""
+        deadline = current_scheduling.get().deadline
+        if deadline is None:
+            return self.tier_timeouts[tier]
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded("Deadline passed before the model call could start")
+        return min(self.tier_timeouts[tier], remaining)
+
+    @staticmethod
+    def _deadline_passed() -> bool:
+        deadline = current_scheduling.get().deadline
+        return deadline is not None and time.monotonic() >= deadline
+
+    async def generate(self, endpoint: str, contents: str, config: Any, size: int = 0) -> Any:
+        """
+        Call generate_content on the best available tier.
+
+        Args:
+            endpoint: Routing policy key, e.g. "analyze_gap"
+            contents: Prompt contents
+            config: GenerateContentConfig passed through to the client
+            size: Input size used by the policy (e.g. preparation_days)
+
+        Returns:
+            The client response of the first tier that succeeds
+        """
+        async with self._slot(endpoint, size):
+            last_error: Optional[Exception] = None
+            for tier in self.candidate_tiers(endpoint, size):
+                model = self.model_tiers[tier]
+                start = time.monotonic()
+                try:
+                    timeout = self._call_timeout(tier)
+                    response = await asyncio.wait_for(
+                        asyncio.to_thread(
+                            self.client.models.generate_content,
+                            model=model,
+                            contents=contents,
+                            config=config_for_model(config, model, timeout),
+                        ),
+                        timeout=timeout + TIMEOUT_GRACE_SECONDS,
+                    )
+                except DeadlineExceeded:
+                    raise
+                except Exception as e:
+                    self.stats[tier].record_failure(e)
+                    if self._deadline_passed():
+                        raise DeadlineExceeded(f"Deadline passed while waiting for {model}") from e
+                    if not is_retryable_error(e):
+                        raise
+                    logger.warning(f"[ROUTER] {model} failed for {endpoint} ({type(e).__name__}), trying next tier")
+                    last_error = e
+                    continue
+
+                latency = time.monotonic() - start
+                self.stats[tier].record_success(latency)
+                logger.info(f"[ROUTER] {endpoint} served by {model} in {latency:.2f}s")
+                return response
+
+            raise last_error or RuntimeError(f"No model tiers configured for {endpoint}")
+
+    async def stream(self, endpoint: str, contents: str, config: Any, size: int = 0) -> AsyncIterator[Any]:
+        """
+        Streaming variant of generate(), yielding response chunks.
+        Falls back to another tier only if no chunk has been received yet.
+        The tier timeout is passed to the SDK, so it also bounds the HTTP stream.
+        """
+        async with self._slot(endpoint, size):
+            last_error: Optional[Exception] = None
+            for tier in self.candidate_tiers(endpoint, size):
+                model = self.model_tiers[tier]
+                start = time.monotonic()
+                timeout = self._call_timeout(tier)
+                chunks = iterate_in_thread(lambda model=model, timeout=timeout: self.client.models.generate_content_stream(
+                    model=model,
+                    contents=contents,
+                    config=config_for_model(config, model, timeout),
+                ))
+                try:
+                    first_chunk = await asyncio.wait_for(chunks.__anext__(), timeout=timeout + TIMEOUT_GRACE_SECONDS)
+                except StopAsyncIteration:
+                    first_chunk = None
+                except Exception as e:
+                    await chunks.aclose()
+                    self.stats[tier].record_failure(e)
+                    if self._deadline_passed():
+                        raise DeadlineExceeded(f"Deadline passed while waiting for {model}") from e
+                    if not is_retryable_error(e):
+                        raise
+                    logger.warning(f"[ROUTER] {model} failed to start stream for {endpoint} ({type(e).__name__}), trying next tier")
+                    last_error = e
+                    continue
+
+                logger.info(f"[ROUTER] {endpoint} streaming from {model}, first chunk after {time.monotonic() - start:.2f}s")
+                try:
+                    if first_chunk is not None:
+                        yield first_chunk
+                    async for chunk in chunks:
+                        yield chunk
+                except Exception as e:
+                    self.stats[tier].record_failure(e)
+                    raise
+                finally:
+                    await chunks.aclose()
+                self.stats[tier].record_success(time.monotonic() - start)
+                return
+
+            raise last_error or RuntimeError(f"No model tiers configured for {endpoint}")
+
+    def get_stats(self) -> dict:
+        return {
+            tier: {"model": self.model_tiers[tier], **stats.to_dict()}
+            for tier, stats in self.stats.items()
+        }
@@ -0,0 +1,92 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CachedResult:
+    body: bytes
+    etag: str
+    created_at: float
+
+
+def compute_etag(body: bytes) -> str:
+    """
+    Weak ETag derived from the serialized response bytes.
+    Weak because CompressionMiddleware sends the same ETag for identity, gzip and
+    brotli bodies, and a strong validator must differ per content-coding (RFC 9110).
+    """
+    return 'W/"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def make_cache_key(namespace: str, payload: dict) -> str:
+    """
+    Build a stable cache key for a generation request.
+
+    Args:
+        namespace: Endpoint name, e.g. "analyze_gap"
+        payload: Request fields that determine the generated result
+
+    Returns:
+        Hex digest that is safe to use in URLs
+    """
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(f"{namespace}:{canonical}".encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    In-memory LRU cache of pre-serialized JSON results with a TTL.
+    Bodies are stored as bytes so cache hits skip model validation and encoding entirely.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, CachedResult]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[CachedResult]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if time.time() - entry.created_at > self.ttl_seconds:
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: str, body: bytes) -> CachedResult:
+        entry = CachedResult(body=body, etag=compute_etag(body), created_at=time.time())
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        logger.debug(f"[CACHE] Stored {len(body)} bytes under {key[:12]}")
+        return entry
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+result_cache = ResultCache(
+    max_entries=int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "512")),
+    ttl_seconds=float(os.getenv("RESULT_CACHE_TTL_SECONDS", "3600")),
+)
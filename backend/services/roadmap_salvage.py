@@ -0,0 +1,170 @@
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from pydantic import ValidationError
+
+from schemas import AnalyzeGapResponse, DayRoadmap, GapAnalysis
+from services.json_stream import JSONStreamScanner
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SalvagedRoadmap:
+    """The usable parts of an analyze_gap response."""
+    gap_analysis: Optional[GapAnalysis] = None
+    days: Dict[int, DayRoadmap] = field(default_factory=dict)
+    summary: Optional[str] = None
+    invalid_days: int = 0  # elements of daily_roadmap that were dropped
+    cleared_gap_references: int = 0  # tasks turned into general tasks
+
+    def missing_days(self, total_days: int) -> List[int]:
+        return [day for day in range(1, total_days + 1) if day not in self.days]
+
+    def is_complete(self, total_days: int) -> bool:
+        return self.gap_analysis is not None and self.summary is not None and not self.missing_days(total_days)
+
+    def to_response(self) -> AnalyzeGapResponse:
+        return AnalyzeGapResponse(
+            gap_analysis=self.gap_analysis,
+            daily_roadmap=[self.days[day] for day in sorted(self.days)],
+            summary=self.summary,
+        )
+
+
+def find_day_problem(day: DayRoadmap, total_days: int) -> Optional[str]:
+    """Return why a parsed day cannot be used at all, or None if it can be kept."""
+    if not 1 <= day.day <= total_days:
+        return f"day {day.day} is outside 1-{total_days}"
+    if not day.tasks:
+        return f"day {day.day} has no tasks"
+    return None
+
+
+def clear_invalid_gap_references(day: DayRoadmap, gap_analysis: GapAnalysis) -> int:
+    """
+    Turn tasks that reference a non-existent gap into general tasks
+    (gap_type and gap_index set to None), e.g. "partial" when partial_skills is empty.
+
+    Returns:
+        Number of tasks that were changed
+    """
+    gap_lists = {"critical": gap_analysis.critical_gaps, "partial": gap_analysis.partial_skills}
+    cleared = 0
+    for task in day.tasks:
+        if task.gap_type is None and task.gap_index is None:
+            continue
+        gaps = gap_lists.get(task.gap_type)
+        if gaps is None or task.gap_index is None or not 0 <= task.gap_index < len(gaps):
+            task.gap_type = None
+            task.gap_index = None
+            cleared += 1
+    return cleared
+
+
+def salvage_roadmap(text: str, total_days: int) -> SalvagedRoadmap:
+    """
+    Recover every usable field of an analyze_gap response.
+
+    Valid JSON is parsed directly. Truncated or malformed JSON is scanned, keeping
+    every complete top-level field and every complete "daily_roadmap" element.
+    Days are dropped if they fail validation, fall outside the roadmap or are
+    duplicated; task references to gaps that do not exist are cleared instead.
+    Without a gap analysis no day can be trusted.
+
+    Args:
+        text: Raw model output
+        total_days: Number of days the roadmap should have
+
+    Returns:
+        SalvagedRoadmap with the valid gap analysis, days and summary
+    """
+    raw_gap_analysis: Any = None
+    raw_days: List[Any] = []
+    raw_summary: Any = None
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        data = None
+
+    if isinstance(data, dict):
+        raw_gap_analysis = data.get("gap_analysis")
+        raw_days = data.get("daily_roadmap") if isinstance(data.get("daily_roadmap"), list) else []
+        raw_summary = data.get("summary")
+    else:
+        for event in JSONStreamScanner().feed(text):
+            if event[0] == "item" and event[1] == "daily_roadmap":
+                raw_days.append(event[3])
+            elif event[0] == "value" and event[1] == "gap_analysis":
+                raw_gap_analysis = event[2]
+            elif event[0] == "value" and event[1] == "summary":
+                raw_summary = event[2]
+
+    result = SalvagedRoadmap()
+    if isinstance(raw_summary, str) and raw_summary.strip():
+        result.summary = raw_summary.strip()
+    try:
+        result.gap_analysis = GapAnalysis.model_validate(raw_gap_analysis)
+    except ValidationError:
+        logger.warning("[SALVAGE] Gap analysis is missing or invalid")
+        result.invalid_days = len(raw_days)
+        return result
+
+    for raw_day in raw_days:
+        try:
+            day = DayRoadmap.model_validate(raw_day)
+        except ValidationError as e:
+            logger.warning(f"[SALVAGE] Dropping invalid day: {e.error_count()} validation errors")
+            result.invalid_days += 1
+            continue
+        problem = find_day_problem(day, total_days)
+        if problem is None and day.day in result.days:
+            problem = f"day {day.day} is duplicated"
+        if problem is not None:
+            logger.warning(f"[SALVAGE] Dropping {problem}")
+            result.invalid_days += 1
+            continue
+        result.cleared_gap_references += clear_invalid_gap_references(day, result.gap_analysis)
+        result.days[day.day] = day
+    return result
+
+
+class SalvageStats:
+    """How often roadmap responses needed repair, and how much of them was kept."""
+
+    def __init__(self):
+        self.responses = 0
+        self.truncated = 0
+        self.repair_attempts = 0
+        self.repaired = 0
+        self.failed = 0
+        self.days_salvaged = 0
+        self.days_regenerated = 0
+        self.summaries_regenerated = 0
+        self.gap_references_cleared = 0
+
+    def to_dict(self) -> dict:
+        days = self.days_salvaged + self.days_regenerated
+        return {
+            "responses": self.responses,
+            "truncated": self.truncated,
+            "repair_attempts": self.repair_attempts,
+            "repaired": self.repaired,
+            "failed": self.failed,
+            "repair_needed_rate": round(self.repair_attempts / max(self.responses, 1), 3),
+            "repair_success_rate": round(self.repaired / max(self.repair_attempts, 1), 3),
+            "days_salvaged": self.days_salvaged,
+            "days_regenerated": self.days_regenerated,
+            "salvaged_day_fraction": round(self.days_salvaged / max(days, 1), 3),
+            "summaries_regenerated": self.summaries_regenerated,
+            "gap_references_cleared": self.gap_references_cleared,
+        }
+
+
+salvage_stats = SalvageStats()
+
+
+def get_salvage_stats() -> dict:
+    return salvage_stats.to_dict()
@@ -0,0 +1,134 @@
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from schemas import AnalyzeGapResponse, DailyTask, ReplanRoadmapRequest, ReplanRoadmapResponse
+from services.gemini_service import generate_roadmap_days_with_gemini
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ReplanPlan:
+    total_days: int
+    kept_days: List[int]
+    regenerate_days: List[int]
+    removed_days: List[int]
+    completed_tasks: Dict[int, List[DailyTask]] = field(default_factory=dict)
+    renumbered_days: Dict[int, int] = field(default_factory=dict)  # old -> new day number of kept days
+
+
+def plan_replan(
+    roadmap: AnalyzeGapResponse,
+    preparation_days: Optional[int] = None,
+    completed_days: Optional[List[int]] = None,
+    interviewer_changed: bool = False,
+) -> ReplanPlan:
+    """
+    Decide which days of an existing roadmap to keep, regenerate or drop.
+
+    - Completed days (listed, or with every task completed) are always kept and
+      count toward the new length, so the result has exactly total_days days
+      (never fewer than the completed days).
+    - A new interviewer type, or a shorter roadmap, regenerates every remaining slot
+      so the plan is redistributed over the days left.
+    - A longer roadmap with the same interviewer only generates the added days.
+    - Kept days take days 1..k in their original order (see renumbered_days) and
+      regenerated days follow, so the result is numbered 1..total_days.
+    - Completed tasks of partially finished days that are not kept are carried into
+      a regenerated day; one is added if every slot is taken by completed days.
+
+    Returns:
+        ReplanPlan with day numbers for each outcome (kept_days and removed_days
+        refer to the existing roadmap, regenerate_days to the new one) and the
+        completed tasks to carry over into regenerated days
+    """
+    existing = {day.day: day for day in roadmap.daily_roadmap}
+    old_total = len(roadmap.daily_roadmap)
+
+    listed = set(completed_days or [])
+    completed = {
+        day for day, roadmap_day in existing.items()
+        if day in listed or (roadmap_day.tasks and all(task.completed for task in roadmap_day.tasks))
+    }
+    total_days = max(preparation_days or old_total, len(completed))
+
+    if interviewer_changed or total_days < old_total:
+        kept_others = []
+    else:
+        kept_others = [day for day in existing if day not in completed]
+
+    kept = sorted(completed.union(kept_others))
+    replaced = [day for day in sorted(existing) if day not in kept]
+    partial = [day for day in replaced if any(task.completed for task in existing[day].tasks)]
+    if partial and total_days == len(kept):
+        total_days += 1
+
+    renumbered = {day: slot for slot, day in enumerate(kept, start=1) if day != slot}
+    regenerate = list(range(len(kept) + 1, total_days + 1))
+    removed = [day for day in sorted(existing) if day > total_days]
+
+    # Replaced days map onto regenerated slots in order; the overflow goes into the last one
+    completed_tasks: Dict[int, List[DailyTask]] = {}
+    for index, day in enumerate(replaced):
+        if day in partial:
+            slot = regenerate[min(index, len(regenerate) - 1)]
+            completed_tasks.setdefault(slot, []).extend(task for task in existing[day].tasks if task.completed)
+
+    return ReplanPlan(
+        total_days=total_days,
+        kept_days=kept,
+        regenerate_days=regenerate,
+        removed_days=removed,
+        completed_tasks=completed_tasks,
+        renumbered_days=renumbered,
+    )
+
+
+async def replan_roadmap(request: ReplanRoadmapRequest) -> ReplanRoadmapResponse:
+    """
+    Regenerate only the affected days of an existing roadmap.
+    The gap analysis is reused as is; the response contains only the delta, numbered
+    1..preparation_days: kept_days stay unchanged at their number, regenerated_days
+    holds new days and kept days that moved to a new number, and removed_days are
+    past the new end.
+    """
+    interviewer_changed = (
+        request.previous_interviewer_type is not None
+        and request.previous_interviewer_type != request.interviewer_type
+    )
+    plan = plan_replan(request.roadmap, request.preparation_days, request.completed_days, interviewer_changed)
+    logger.info(
+        f"[REPLAN] Days: {plan.total_days}, Keep: {plan.kept_days}, "
+        f"Regenerate: {plan.regenerate_days}, Remove: {plan.removed_days}, Renumber: {plan.renumbered_days}"
+    )
+
+    # Kept days under their new numbers, as context for the regenerated ones
+    existing_days = [
+        day.model_copy(update={"day": plan.renumbered_days.get(day.day, day.day)})
+        for day in request.roadmap.daily_roadmap
+        if day.day in plan.kept_days
+    ]
+    regenerated = []
+    if plan.regenerate_days:
+        regenerated = await generate_roadmap_days_with_gemini(
+            resume_text=request.resume_text,
+            jd_text=request.jd_text,
+            gap_analysis=request.roadmap.gap_analysis,
+            day_numbers=plan.regenerate_days,
+            total_days=plan.total_days,
+            existing_days=existing_days,
+            completed_tasks=plan.completed_tasks,
+            interview_mode=request.interview_mode,
+            interviewer_type=request.interviewer_type or "technical",
+            learning_style=request.learning_style or "theory_code"
+        )
+
+    moved_to = set(plan.renumbered_days.values())
+    moved = [day for day in existing_days if day.day in moved_to]
+    return ReplanRoadmapResponse(
+        preparation_days=plan.total_days,
+        kept_days=[day for day in plan.kept_days if day not in plan.renumbered_days],
+        removed_days=plan.removed_days,
+        regenerated_days=sorted(moved + regenerated, key=lambda day: day.day),
+    )
@@ -0,0 +1,204 @@
+import asyncio
+import contextvars
+import logging
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    """Scheduling classes for LLM work; lower values are served first."""
+    PANIC = 0        # interactive panic mode
+    INTERACTIVE = 1  # interactive roadmaps and topic content
+    PREFETCH = 2     # speculative work no request will wait on
+    BULK = 3         # bulk analysis jobs
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request can no longer finish before its deadline."""
+
+
+@dataclass
+class SchedulingContext:
+    priority: Optional[Priority] = None
+    deadline: Optional[float] = None  # time.monotonic() value
+
+
+# Set by request handlers / background jobs and read by the model router
+current_scheduling: contextvars.ContextVar[SchedulingContext] = contextvars.ContextVar(
+    "current_scheduling", default=SchedulingContext()
+)
+
+
+@contextmanager
+def scheduling(priority: Optional[Priority] = None, deadline: Optional[float] = None):
+    """
+    Run the enclosed LLM calls with the given priority and/or deadline.
+    Tasks created inside the block inherit the setting.
+    """
+    token = current_scheduling.set(SchedulingContext(priority=priority, deadline=deadline))
+    try:
+        yield
+    finally:
+        current_scheduling.reset(token)
+
+
+@dataclass
+class _Waiter:
+    priority: Priority
+    enqueued_at: float
+    deadline: Optional[float]
+    expected_seconds: float
+    future: asyncio.Future = field(repr=False)
+
+    def effective_priority(self, now: float, aging_seconds: float) -> float:
+        # Starvation protection: waiting aging_seconds promotes a waiter by one class,
+        # but background work never ages past INTERACTIVE so panic mode always goes first
+        aged = self.priority - (now - self.enqueued_at) / aging_seconds
+        return max(aged, min(self.priority, Priority.INTERACTIVE))
+
+
+class ClassStats:
+    """Queue wait times and outcomes for one priority class."""
+
+    def __init__(self, window: int = 500):
+        self.admitted = 0
+        self.dropped = 0
+        self.waits = deque(maxlen=window)
+
+    def to_dict(self, queued: int) -> dict:
+        waits = sorted(self.waits)
+
+        def percentile(p: float) -> Optional[float]:
+            if not waits:
+                return None
+            return round(waits[min(len(waits) - 1, int(p * len(waits)))], 3)
+
+        return {
+            "queued": queued,
+            "admitted": self.admitted,
+            "dropped": self.dropped,
+            "wait_p50_seconds": percentile(0.50),
+            "wait_p95_seconds": percentile(0.95),
+            "wait_max_seconds": round(waits[-1], 3) if waits else None,
+        }
+
+
+class LLMScheduler:
+    """
+    Limit concurrent LLM calls and hand free slots to the highest-priority waiter.
+
+    Waiters age toward higher priority so background work is never starved (up to
+    INTERACTIVE; only panic mode requests are PANIC), and waiters that can no longer meet their deadline are dropped instead of served.
+    """
+
+    def __init__(self, max_concurrency: int = 8, aging_seconds: float = 30):
+        self.max_concurrency = max_concurrency
+        self.aging_seconds = aging_seconds
+        self.active = 0
+        self._waiters: List[_Waiter] = []
+        self.stats: Dict[Priority, ClassStats] = {priority: ClassStats() for priority in Priority}
+
+    def _record_admit(self, waiter_priority: Priority, waited: float):
+        stats = self.stats[waiter_priority]
+        stats.admitted += 1
+        stats.waits.append(waited)
+
+    @staticmethod
+    def _can_meet_deadline(deadline: Optional[float], expected_seconds: float, now: float) -> bool:
+        return deadline is None or deadline - now >= expected_seconds
+
+    async def acquire(self, priority: Priority, deadline: Optional[float] = None, expected_seconds: float = 0):
+        """
+        Wait for a slot.
+
+        Args:
+            priority: Scheduling class
+            deadline: time.monotonic() value by which the call must finish
+            expected_seconds: Estimated call duration, used to drop hopeless requests early
+
+        Raises:
+            DeadlineExceeded: If the deadline cannot be met
+        """
+        now = time.monotonic()
+        if not self._can_meet_deadline(deadline, expected_seconds, now):
+            self.stats[priority].dropped += 1
+            raise DeadlineExceeded(f"Deadline cannot be met (needs ~{expected_seconds:.1f}s)")
+
+        if self.active < self.max_concurrency and not self._waiters:
+            self.active += 1
+            self._record_admit(priority, 0.0)
+            return
+
+        waiter = _Waiter(
+            priority=priority,
+            enqueued_at=now,
+            deadline=deadline,
+            expected_seconds=expected_seconds,
+            future=asyncio.get_running_loop().create_future(),
+        )
+        self._waiters.append(waiter)
+        try:
+            if deadline is None:
+                await waiter.future
+            else:
+                await asyncio.wait_for(asyncio.shield(waiter.future), timeout=max(0.0, deadline - expected_seconds - now))
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.future.done() and not waiter.future.cancelled() and waiter.future.exception() is None:
+                # The slot was handed over just as we gave up; pass it on
+                self.release()
+            else:
+                waiter.future.cancel()
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                self.stats[priority].dropped += 1
+                raise DeadlineExceeded("Deadline passed while waiting for a model slot")
+            raise
+
+    def release(self):
+        """Hand the slot to the best waiter that can still meet its deadline, or free it."""
+        now = time.monotonic()
+        while self._waiters:
+            waiter = min(self._waiters, key=lambda w: (w.effective_priority(now, self.aging_seconds), w.enqueued_at))
+            self._waiters.remove(waiter)
+            if waiter.future.done():
+                continue
+            if not self._can_meet_deadline(waiter.deadline, waiter.expected_seconds, now):
+                self.stats[waiter.priority].dropped += 1
+                waiter.future.set_exception(DeadlineExceeded("Deadline cannot be met after queueing"))
+                continue
+            self._record_admit(waiter.priority, now - waiter.enqueued_at)
+            waiter.future.set_result(None)
+            return
+        self.active -= 1
+
+    @asynccontextmanager
+    async def slot(self, priority: Priority, deadline: Optional[float] = None, expected_seconds: float = 0):
+        await self.acquire(priority, deadline, expected_seconds)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def get_stats(self) -> dict:
+        queued = {priority: 0 for priority in Priority}
+        for waiter in self._waiters:
+            queued[waiter.priority] += 1
+        return {
+            "active": self.active,
+            "max_concurrency": self.max_concurrency,
+            "classes": {priority.name.lower(): self.stats[priority].to_dict(queued[priority]) for priority in Priority},
+        }
+
+
+llm_scheduler = LLMScheduler(
+    max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+    aging_seconds=float(os.getenv("LLM_SCHEDULER_AGING_SECONDS", "30")),
+)
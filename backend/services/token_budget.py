@@ -0,0 +1,183 @@
+import json
+import logging
+import math
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Rough output sizes (in tokens) used to size max_output_tokens
+TOKENS_PER_WORD = 1.4
+GAP_ANALYSIS_TOKENS = 400
+SUMMARY_TOKENS = 120
+DAY_OVERHEAD_TOKENS = 60
+TASK_TOKENS = 70
+DEFAULT_TASKS_PER_DAY = 5
+PANIC_MODE_TOKENS = 2500
+DEFAULT_TOPIC_WORD_TARGET = 500
+DEFAULT_PERSONALIZATION_WORD_TARGET = 120
+
+# Headroom over the estimate so normal variance does not truncate
+SAFETY_FACTOR = 1.5
+MAX_OUTPUT_TOKENS_CAP = 65536
+
+
+@dataclass
+class TokenBudget:
+    max_output_tokens: int
+    thinking_budget: int
+
+
+def load_budget_overrides() -> Dict[str, Dict[str, int]]:
+    """
+    Per-endpoint overrides from GEMINI_BUDGET_OVERRIDES (JSON), e.g.
+    {"topic_content": {"max_output_tokens": 2048, "thinking_budget": 0}}
+    """
+    raw = os.getenv("GEMINI_BUDGET_OVERRIDES")
+    if not raw:
+        return {}
+    try:
+        return json.loads(raw)
+    except json.JSONDecodeError as e:
+        logger.error(f"[BUDGET] ❌ Ignoring invalid GEMINI_BUDGET_OVERRIDES: {str(e)}")
+        return {}
+
+
+BUDGET_OVERRIDES = load_budget_overrides()
+
+
+def compute_budget(
+    endpoint: str,
+    preparation_days: Optional[int] = None,
+    task_count: Optional[int] = None,
+    word_target: Optional[int] = None,
+) -> TokenBudget:
+    """
+    Compute output and thinking budgets for a generation request.
+
+    Thinking tokens count against max_output_tokens on Gemini 2.5, so the
+    thinking budget (including a GEMINI_BUDGET_OVERRIDES value) is added on top
+    of the expected answer size, unless max_output_tokens is overridden too.
+
+    Args:
+        endpoint: Budget policy key ("analyze_gap", "roadmap_days", "roadmap_summary", "topic_content", "topic_personalization", "panic_mode")
+        preparation_days: Number of roadmap days to generate
+        task_count: Expected number of tasks (defaults to days * DEFAULT_TASKS_PER_DAY)
+        word_target: Upper word target for free-form markdown
+
+    Returns:
+        TokenBudget with max_output_tokens and thinking_budget
+    """
+    if endpoint == "analyze_gap":
+        days = preparation_days or 1
+        tasks = task_count or days * DEFAULT_TASKS_PER_DAY
+        expected = GAP_ANALYSIS_TOKENS + SUMMARY_TOKENS + days * DAY_OVERHEAD_TOKENS + tasks * TASK_TOKENS
+        thinking_budget = 1024 if days <= 7 else 2048
+    elif endpoint == "roadmap_days":
+        days = preparation_days or 1
+        tasks = task_count or days * DEFAULT_TASKS_PER_DAY
+        expected = days * DAY_OVERHEAD_TOKENS + tasks * TASK_TOKENS
+        thinking_budget = 512 if days <= 7 else 1024
+    elif endpoint == "roadmap_summary":
+        expected = SUMMARY_TOKENS
+        thinking_budget = 0
+    elif endpoint == "topic_content":
+        expected = (word_target or DEFAULT_TOPIC_WORD_TARGET) * TOKENS_PER_WORD
+        thinking_budget = 0
+    elif endpoint == "topic_personalization":
+        expected = (word_target or DEFAULT_PERSONALIZATION_WORD_TARGET) * TOKENS_PER_WORD
+        thinking_budget = 0
+    elif endpoint == "panic_mode":
+        expected = PANIC_MODE_TOKENS
+        thinking_budget = 512
+    else:
+        expected = 4096
+        thinking_budget = 0
+
+    override = BUDGET_OVERRIDES.get(endpoint, {})
+    if "thinking_budget" in override:
+        thinking_budget = int(override["thinking_budget"])
+    if "max_output_tokens" in override:
+        max_output_tokens = int(override["max_output_tokens"])
+    else:
+        # Derived from the final thinking budget, so a larger override cannot eat the answer's share
+        max_output_tokens = min(MAX_OUTPUT_TOKENS_CAP, math.ceil(expected * SAFETY_FACTOR) + thinking_budget)
+    return TokenBudget(max_output_tokens=max_output_tokens, thinking_budget=thinking_budget)
+
+
+def clamp_thinking_budget(model: str, thinking_budget: int) -> int:
+    """
+    Fit a thinking budget into the range a model accepts.
+    Pro models cannot disable thinking; flash-lite accepts 0 or at least 512.
+    """
+    if "pro" in model:
+        return min(max(thinking_budget, 128), 32768)
+    if "flash-lite" in model:
+        if thinking_budget <= 0:
+            return 0
+        return min(max(thinking_budget, 512), 24576)
+    return min(max(thinking_budget, 0), 24576)
+
+
+class BudgetStats:
+    """Token usage versus budget for one endpoint."""
+
+    def __init__(self):
+        self.calls = 0
+        self.truncated = 0
+        self.output_tokens = 0
+        self.thinking_tokens = 0
+        self.budget_tokens = 0
+
+    def to_dict(self) -> dict:
+        calls = self.calls or 1
+        return {
+            "calls": self.calls,
+            "truncated": self.truncated,
+            "truncation_rate": round(self.truncated / calls, 3),
+            "avg_output_tokens": round(self.output_tokens / calls),
+            "avg_thinking_tokens": round(self.thinking_tokens / calls),
+            "avg_budget_utilization": round((self.output_tokens + self.thinking_tokens) / max(self.budget_tokens, 1), 3),
+        }
+
+
+budget_stats: Dict[str, BudgetStats] = {}
+
+
+def is_truncated(response: Any) -> bool:
+    """True if the first candidate stopped because it hit max_output_tokens."""
+    candidates = getattr(response, "candidates", None) or []
+    if not candidates:
+        return False
+    reason = getattr(candidates[0], "finish_reason", None)
+    return getattr(reason, "name", reason) == "MAX_TOKENS"
+
+
+def record_usage(endpoint: str, budget: TokenBudget, response: Any):
+    """
+    Log tokens used against the budget and accumulate per-endpoint stats.
+    """
+    usage = getattr(response, "usage_metadata", None)
+    output_tokens = (getattr(usage, "candidates_token_count", None) or 0) if usage else 0
+    thinking_tokens = (getattr(usage, "thoughts_token_count", None) or 0) if usage else 0
+    truncated = is_truncated(response)
+
+    stats = budget_stats.setdefault(endpoint, BudgetStats())
+    stats.calls += 1
+    stats.output_tokens += output_tokens
+    stats.thinking_tokens += thinking_tokens
+    stats.budget_tokens += budget.max_output_tokens
+    if truncated:
+        stats.truncated += 1
+
+    logger.info(
+        f"[BUDGET] {endpoint} - Output: {output_tokens}, Thinking: {thinking_tokens}/{budget.thinking_budget}, "
+        f"Total: {output_tokens + thinking_tokens}/{budget.max_output_tokens}"
+    )
+    if truncated:
+        logger.warning(f"[BUDGET] ⚠️ {endpoint} response truncated at max_output_tokens={budget.max_output_tokens}")
+
+
+def get_budget_stats() -> dict:
+    return {endpoint: stats.to_dict() for endpoint, stats in budget_stats.items()}
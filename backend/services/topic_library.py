@@ -0,0 +1,342 @@
+import asyncio
+import logging
+import re
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+
+from database import SessionLocal, TopicContentModel
+from services.scheduler import DeadlineExceeded, current_scheduling, scheduling
+
+logger = logging.getLogger(__name__)
+
+# (normalized topic, task_type, learning_style)
+TopicKey = Tuple[str, str, str]
+
+
+@dataclass
+class GeneratedContent:
+    """Base content from the model; truncated is set when it hit max_output_tokens."""
+    text: str
+    truncated: bool = False
+
+
+BaseContentGenerator = Callable[[str, str, str], Awaitable[GeneratedContent]]
+BaseContentStreamer = Callable[[str, str, str], AsyncIterator[GeneratedContent]]
+
+
+def normalize_topic(topic: str) -> str:
+    """
+    Normalize a topic so wording variants share one library entry.
+    Keeps characters that carry meaning in tech names (C++, C#, Node.js, .NET).
+
+    Example: "  Kubernetes Basics!! " -> "kubernetes basics"
+    """
+    text = topic.lower().strip()
+    text = re.sub(r"[^\w\s+#.]", " ", text)
+    text = re.sub(r"\.(?=\s|$)", " ", text)  # sentence periods, not "node.js"
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def make_topic_key(topic: str, task_type: str, learning_style: str) -> TopicKey:
+    return normalize_topic(topic), task_type.strip().lower(), learning_style.strip().lower()
+
+
+def start_shared_generation(coroutine: Awaitable) -> asyncio.Future:
+    """
+    Start a generation that several requests may wait on. The task copies the context
+    it is created in, so it is started under a neutral scheduling context: no deadline,
+    and the endpoint's own priority (INTERACTIVE). One caller's deadline or background
+    priority must not apply to the others; each caller bounds its own wait with
+    wait_within_deadline().
+    """
+    with scheduling():
+        return asyncio.ensure_future(coroutine)
+
+
+async def wait_within_deadline(awaitable: Awaitable):
+    """
+    Await on behalf of the current request, raising DeadlineExceeded at its deadline.
+    Only this wait is abandoned; pass a shielded awaitable to keep the work running.
+    """
+    deadline = current_scheduling.get().deadline
+    if deadline is None:
+        return await awaitable
+    try:
+        return await asyncio.wait_for(awaitable, timeout=max(0.0, deadline - time.monotonic()))
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded("Deadline passed while waiting for shared topic content")
+
+
+class TopicLibrary:
+    """
+    Shared, user-independent base content for topics, stored in the database.
+    Entries are generated on first request; concurrent requests for the same
+    key share a single generation.
+
+    The database methods are synchronous; async callers run them with asyncio.to_thread.
+    """
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+        self._in_flight: Dict[TopicKey, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, key: TopicKey) -> Optional[str]:
+        """Return stored content for a key, counting hits and misses."""
+        db = self.session_factory()
+        try:
+            row = db.query(TopicContentModel).filter(
+                TopicContentModel.topic_key == key[0],
+                TopicContentModel.task_type == key[1],
+                TopicContentModel.learning_style == key[2],
+            ).first()
+            if row is None:
+                self.misses += 1
+                return None
+            row.hit_count += 1
+            db.commit()
+            self.hits += 1
+            return row.content
+        finally:
+            db.close()
+
+    def store(self, topic: str, key: TopicKey, content: str, replace: bool = False):
+        """Store content for a key; an existing entry is only overwritten with replace=True."""
+        db = self.session_factory()
+        try:
+            row = None
+            if replace:
+                row = db.query(TopicContentModel).filter(
+                    TopicContentModel.topic_key == key[0],
+                    TopicContentModel.task_type == key[1],
+                    TopicContentModel.learning_style == key[2],
+                ).first()
+            if row is not None:
+                row.content = content
+            else:
+                db.add(TopicContentModel(
+                    topic_key=key[0],
+                    topic=topic,
+                    task_type=key[1],
+                    learning_style=key[2],
+                    content=content,
+                    hit_count=1,
+                ))
+            db.commit()
+        except IntegrityError:
+            # Another worker stored the same key first
+            db.rollback()
+        finally:
+            db.close()
+
+    async def get_or_generate(
+        self,
+        topic: str,
+        task_type: str,
+        learning_style: str,
+        generate: BaseContentGenerator,
+        regenerate: bool = False,
+    ) -> str:
+        """
+        Get base content from the library, generating and storing it on a miss.
+
+        Args:
+            topic: Topic as written in the task
+            task_type: Task type ("Read", "Build", ...)
+            learning_style: Learning style ("practical", "theoretical", "balanced")
+            generate: Coroutine function (topic, task_type, learning_style) -> GeneratedContent
+            regenerate: Skip the stored entry and replace it with freshly generated content
+
+        Returns:
+            Base markdown content for the topic
+        """
+        key = make_topic_key(topic, task_type, learning_style)
+        if not regenerate:
+            content = await asyncio.to_thread(self.lookup, key)
+            if content is not None:
+                logger.info(f"[TOPICS] ✅ Library hit for '{key[0]}' ({key[1]}, {key[2]})")
+                return content
+
+        future = self._in_flight.get(key)
+        if future is None:
+            future = start_shared_generation(self._generate_and_store(topic, key, generate, regenerate))
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # Shield so one cancelled or timed out request does not abort a generation others are waiting on
+        return await wait_within_deadline(asyncio.shield(future))
+
+    async def _generate_and_store(
+        self,
+        topic: str,
+        key: TopicKey,
+        generate: BaseContentGenerator,
+        replace: bool,
+    ) -> str:
+        logger.info(f"[TOPICS] Generating base content for '{key[0]}' ({key[1]}, {key[2]})")
+        result = await generate(topic, key[1], key[2])
+        content = result.text.strip()
+        await self._store_if_complete(topic, key, content, result.truncated, replace)
+        return content
+
+    async def _store_if_complete(self, topic: str, key: TopicKey, content: str, truncated: bool, replace: bool):
+        # The library is shared by every user, so a cut-off or empty answer must not become its entry
+        if truncated or not content:
+            reason = "truncated" if truncated else "empty"
+            logger.warning(f"[TOPICS] ⚠️ Not storing {reason} content for '{key[0]}' ({key[1]}, {key[2]})")
+            return
+        await asyncio.to_thread(self.store, topic, key, content, replace)
+
+    async def stream_or_generate(
+        self,
+        topic: str,
+        task_type: str,
+        learning_style: str,
+        stream: BaseContentStreamer,
+        regenerate: bool = False,
+    ) -> AsyncIterator[str]:
+        """
+        Streaming variant of get_or_generate().
+
+        On a miss the base content is yielded chunk by chunk as it is generated. The
+        generation is registered as in flight, so concurrent requests for the same key
+        (streaming or not) wait for it and receive the content whole instead of
+        generating it again.
+
+        Args:
+            stream: Async generator function (topic, task_type, learning_style) -> GeneratedContent chunks
+            regenerate: Skip the stored entry and replace it with freshly generated content
+
+        Yields:
+            Base markdown content (a library hit or a waiter gets it in one chunk)
+        """
+        key = make_topic_key(topic, task_type, learning_style)
+        if not regenerate:
+            content = await asyncio.to_thread(self.lookup, key)
+            if content is not None:
+                logger.info(f"[TOPICS] ✅ Library hit for '{key[0]}' ({key[1]}, {key[2]})")
+                yield content
+                return
+
+        future = self._in_flight.get(key)
+        if future is not None:
+            yield await wait_within_deadline(asyncio.shield(future))
+            return
+
+        chunks: asyncio.Queue = asyncio.Queue()
+        future = start_shared_generation(self._stream_and_store(topic, key, stream, chunks, regenerate))
+        self._in_flight[key] = future
+        future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        while (text := await wait_within_deadline(chunks.get())) is not None:
+            yield text
+        # Re-raise generation errors; shielded like get_or_generate()
+        await wait_within_deadline(asyncio.shield(future))
+
+    async def _stream_and_store(
+        self,
+        topic: str,
+        key: TopicKey,
+        stream: BaseContentStreamer,
+        chunks: asyncio.Queue,
+        replace: bool,
+    ) -> str:
+        logger.info(f"[TOPICS] Streaming base content for '{key[0]}' ({key[1]}, {key[2]})")
+        parts = []
+        truncated = False
+        try:
+            async for chunk in stream(topic, key[1], key[2]):
+                truncated = truncated or chunk.truncated
+                if chunk.text:
+                    parts.append(chunk.text)
+                    chunks.put_nowait(chunk.text)
+        finally:
+            chunks.put_nowait(None)
+        content = "".join(parts).strip()
+        await self._store_if_complete(topic, key, content, truncated, replace)
+        return content
+
+    def popular_topics(self, limit: int = 20) -> List[Tuple[str, str]]:
+        """Most requested (topic, task_type) pairs across all learning styles."""
+        db = self.session_factory()
+        try:
+            rows = (
+                db.query(
+                    TopicContentModel.topic_key,
+                    TopicContentModel.task_type,
+                    func.min(TopicContentModel.topic),
+                    func.sum(TopicContentModel.hit_count).label("hits"),
+                )
+                .group_by(TopicContentModel.topic_key, TopicContentModel.task_type)
+                .order_by(func.sum(TopicContentModel.hit_count).desc())
+                .limit(limit)
+                .all()
+            )
+            return [(row[2], row[1]) for row in rows]
+        finally:
+            db.close()
+
+    def has_entry(self, key: TopicKey) -> bool:
+        db = self.session_factory()
+        try:
+            return db.query(TopicContentModel.id).filter(
+                TopicContentModel.topic_key == key[0],
+                TopicContentModel.task_type == key[1],
+                TopicContentModel.learning_style == key[2],
+            ).first() is not None
+        finally:
+            db.close()
+
+    async def prewarm(
+        self,
+        entries: Iterable[Tuple[str, str, str]],
+        generate: BaseContentGenerator,
+        concurrency: int = 4,
+    ) -> Tuple[int, int]:
+        """
+        Generate missing library entries ahead of user requests.
+
+        Args:
+            entries: (topic, task_type, learning_style) triples to warm
+            generate: Base content generator
+            concurrency: Maximum generations in flight
+
+        Returns:
+            Tuple of (generated, already_cached)
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        missing = []
+        already_cached = 0
+        seen = set()
+        for topic, task_type, learning_style in entries:
+            key = make_topic_key(topic, task_type, learning_style)
+            if key in seen:
+                continue
+            seen.add(key)
+            if await asyncio.to_thread(self.has_entry, key):
+                already_cached += 1
+            else:
+                missing.append((topic, key))
+
+        async def warm(topic: str, key: TopicKey) -> bool:
+            async with semaphore:
+                try:
+                    await self.get_or_generate(topic, key[1], key[2], generate)
+                    return True
+                except Exception as e:
+                    logger.error(f"[TOPICS] ❌ Prewarm failed for '{key[0]}': {str(e)}")
+                    return False
+
+        results = await asyncio.gather(*(warm(topic, key) for topic, key in missing))
+        generated = sum(1 for ok in results if ok)
+        logger.info(f"[TOPICS] Prewarm done - Generated: {generated}, Already cached: {already_cached}")
+        return generated, already_cached
+
+    def get_stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "in_flight": len(self._in_flight)}
+
+
+topic_library = TopicLibrary()
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Import backend modules the way main.py does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# gemini_service requires a key at import time; the tests never call the API
+os.environ.setdefault("GOOGLE_API_KEY", "test-key")
@@ -0,0 +1,105 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from google.genai import types
+
+from services.model_router import ModelRouter
+
+MODEL_TIERS = {"fast": "stub-fast", "standard": "stub-standard", "large": "stub-large"}
+
+
+class StubError(Exception):
+    def __init__(self, code: int):
+        super().__init__(f"HTTP {code}")
+        self.code = code
+
+
+class StubModels:
+    """
+    Stands in for client.models. Each model has a latency; like the SDK, a call is
+    aborted with httpx.ReadTimeout when its latency exceeds http_options.timeout.
+    """
+
+    def __init__(self, latencies=None, errors=None):
+        self.latencies = latencies or {}
+        self.errors = errors or {}
+        self.calls = []
+
+    def _call(self, model, config):
+        timeout = config.http_options.timeout / 1000
+        self.calls.append((model, timeout))
+        if model in self.errors:
+            raise self.errors[model]
+        latency = self.latencies.get(model, 0)
+        if latency > timeout:
+            time.sleep(timeout)
+            raise httpx.ReadTimeout("timed out")
+        time.sleep(latency)
+
+    def generate_content(self, model, contents, config):
+        self._call(model, config)
+        return SimpleNamespace(text=f"{model}: {contents}")
+
+    def generate_content_stream(self, model, contents, config):
+        self._call(model, config)
+        return iter([SimpleNamespace(text=f"{model} "), SimpleNamespace(text=contents)])
+
+
+def make_router(models: StubModels, timeouts=None) -> ModelRouter:
+    return ModelRouter(
+        SimpleNamespace(models=models),
+        model_tiers=dict(MODEL_TIERS),
+        tier_timeouts=timeouts or {"fast": 0.05, "standard": 1, "large": 1},
+        policy={"panic_mode": [[None, "fast"]]},
+    )
+
+
+def config() -> types.GenerateContentConfig:
+    return types.GenerateContentConfig(thinking_config=types.ThinkingConfig(thinking_budget=0))
+
+
+def test_timeout_is_passed_to_the_sdk_and_falls_back():
+    models = StubModels(latencies={"stub-fast": 0.5})
+    router = make_router(models)
+
+    start = time.monotonic()
+    response = asyncio.run(router.generate("panic_mode", contents="hi", config=config()))
+
+    assert response.text == "stub-standard: hi"
+    assert models.calls[0] == ("stub-fast", 0.05)
+    # The SDK timeout ended the slow call; no waiting for the backstop
+    assert time.monotonic() - start < 0.5
+    assert router.get_stats()["fast"]["timeouts"] == 1
+
+
+def test_overloaded_tier_falls_back_and_cools_down():
+    models = StubModels(errors={"stub-fast": StubError(503)})
+    router = make_router(models)
+
+    response = asyncio.run(router.generate("panic_mode", contents="hi", config=config()))
+
+    assert response.text == "stub-standard: hi"
+    assert router.get_stats()["fast"]["healthy"] is False
+    assert router.candidate_tiers("panic_mode")[0] != "fast"
+
+
+def test_non_retryable_error_is_raised():
+    models = StubModels(errors={"stub-fast": StubError(400)})
+    router = make_router(models)
+
+    with pytest.raises(StubError):
+        asyncio.run(router.generate("panic_mode", contents="hi", config=config()))
+    assert [model for model, _ in models.calls] == ["stub-fast"]
+
+
+def test_stream_falls_back_before_the_first_chunk():
+    models = StubModels(errors={"stub-fast": StubError(429)})
+    router = make_router(models)
+
+    async def collect():
+        return [chunk.text async for chunk in router.stream("panic_mode", contents="hi", config=config())]
+
+    assert asyncio.run(collect()) == ["stub-standard ", "hi"]
@@ -0,0 +1,41 @@
+from fastapi.testclient import TestClient
+
+import main
+from schemas import PanicModeResponse
+from services import gemini_service
+from services.result_cache import ResultCache
+
+PANIC_REQUEST = {
+    "resume_text": "Backend engineer with Python experience",
+    "jd_text": "Senior platform engineer, Kubernetes required",
+}
+
+
+def test_no_cache_request_regenerates_cached_result(monkeypatch):
+    calls = []
+
+    async def fake_panic_mode(**kwargs):
+        calls.append(kwargs)
+        return PanicModeResponse(
+            critical_gaps=[f"Gap {len(calls)}"],
+            quick_wins=[],
+            must_know_topics=[],
+            survival_tips=[],
+            talking_points=[],
+        )
+
+    monkeypatch.setattr(gemini_service, "generate_panic_mode_with_gemini", fake_panic_mode)
+    monkeypatch.setattr(main, "result_cache", ResultCache())
+    client = TestClient(main.app)
+
+    first = client.post("/panic_mode", json=PANIC_REQUEST)
+    cached = client.post("/panic_mode", json=PANIC_REQUEST)
+    fresh = client.post("/panic_mode", json=PANIC_REQUEST, headers={"Cache-Control": "no-cache"})
+    after = client.post("/panic_mode", json=PANIC_REQUEST)
+
+    assert len(calls) == 2
+    assert cached.json() == first.json()
+    assert fresh.json()["critical_gaps"] == ["Gap 2"]
+    # The regenerated result replaces the cached one
+    assert after.json() == fresh.json()
+    assert after.headers["ETag"] == fresh.headers["ETag"]
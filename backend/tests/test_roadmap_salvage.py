@@ -0,0 +1,89 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+from services import gemini_service
+from services.roadmap_salvage import salvage_roadmap
+
+GAP_ANALYSIS = {"critical_gaps": ["Kubernetes", "System design"], "partial_skills": []}
+
+
+def make_day(day: int, gap_type="critical", gap_index=0) -> dict:
+    return {
+        "day": day,
+        "title": f"Day {day}",
+        "focus": "Focus",
+        "tasks": [
+            {"task": "Read the docs", "type": "Read", "duration": "1 hour", "completed": False, "gap_type": "critical", "gap_index": 0},
+            {"task": "Practice", "type": "Practice", "duration": "2 hours", "completed": False, "gap_type": gap_type, "gap_index": gap_index},
+        ],
+    }
+
+
+def make_response(days, summary="Focus on Kubernetes first.") -> str:
+    return json.dumps({"gap_analysis": GAP_ANALYSIS, "daily_roadmap": days, "summary": summary})
+
+
+def test_bad_gap_references_are_cleared_not_dropped():
+    text = make_response([
+        make_day(1, gap_type="partial", gap_index=0),  # partial_skills is empty
+        make_day(2, gap_type="critical", gap_index=5),  # out of range
+        make_day(3, gap_type="critical", gap_index=None),
+    ])
+
+    salvaged = salvage_roadmap(text, total_days=3)
+
+    assert salvaged.is_complete(3)
+    assert sorted(salvaged.days) == [1, 2, 3]
+    assert salvaged.cleared_gap_references == 3
+    for day in salvaged.days.values():
+        assert (day.tasks[0].gap_type, day.tasks[0].gap_index) == ("critical", 0)
+        assert (day.tasks[1].gap_type, day.tasks[1].gap_index) == (None, None)
+
+
+def test_bad_gap_references_need_no_follow_up_call(monkeypatch):
+    text = make_response([make_day(day, gap_type="partial", gap_index=0) for day in (1, 2, 3)])
+    calls = []
+
+    async def fake_generate(endpoint, contents, config, size=0):
+        calls.append(endpoint)
+        return SimpleNamespace(text=text, candidates=[], usage_metadata=None)
+
+    monkeypatch.setattr(gemini_service.model_router, "generate", fake_generate)
+    result = asyncio.run(gemini_service.analyze_gap_with_gemini("resume text", "job description", preparation_days=3))
+
+    assert calls == ["analyze_gap"]
+    assert [day.day for day in result.daily_roadmap] == [1, 2, 3]
+
+
+def test_truncated_response_keeps_complete_days():
+    text = make_response([make_day(1), make_day(2), make_day(3)])
+    cut = text.index('"day": 3') + 20
+
+    salvaged = salvage_roadmap(text[:cut], total_days=3)
+
+    assert salvaged.gap_analysis.critical_gaps == GAP_ANALYSIS["critical_gaps"]
+    assert sorted(salvaged.days) == [1, 2]
+    assert salvaged.missing_days(3) == [3]
+    assert salvaged.summary is None
+
+
+def test_invalid_out_of_range_and_duplicate_days_are_dropped():
+    broken = make_day(2)
+    del broken["tasks"]
+    text = make_response([make_day(1), broken, make_day(1), make_day(4)])
+
+    salvaged = salvage_roadmap(text, total_days=3)
+
+    assert sorted(salvaged.days) == [1]
+    assert salvaged.invalid_days == 3
+    assert salvaged.missing_days(3) == [2, 3]
+
+
+def test_missing_gap_analysis_salvages_nothing():
+    text = json.dumps({"daily_roadmap": [make_day(1)], "summary": "Summary"})
+
+    salvaged = salvage_roadmap(text, total_days=1)
+
+    assert salvaged.gap_analysis is None
+    assert salvaged.days == {}
@@ -0,0 +1,112 @@
+from schemas import AnalyzeGapResponse, DailyTask, DayRoadmap, GapAnalysis
+from services.roadmap_service import plan_replan
+
+
+def make_roadmap(days: int, completed=(), partial=()) -> AnalyzeGapResponse:
+    """Roadmap with two tasks per day; days in completed are fully done, days in partial half done."""
+    daily_roadmap = []
+    for day in range(1, days + 1):
+        tasks = [
+            DailyTask(task=f"Day {day} task {i}", type="Read", duration="1 hour",
+                      completed=day in completed or (day in partial and i == 0))
+            for i in range(2)
+        ]
+        daily_roadmap.append(DayRoadmap(day=day, title=f"Day {day}", focus="Focus", tasks=tasks))
+    return AnalyzeGapResponse(
+        gap_analysis=GapAnalysis(critical_gaps=["Kubernetes"], partial_skills=[]),
+        daily_roadmap=daily_roadmap,
+        summary="Summary",
+    )
+
+
+def test_longer_roadmap_only_generates_added_days():
+    plan = plan_replan(make_roadmap(3), preparation_days=5)
+
+    assert plan.total_days == 5
+    assert plan.kept_days == [1, 2, 3]
+    assert plan.regenerate_days == [4, 5]
+    assert plan.removed_days == []
+
+
+def test_shorter_roadmap_redistributes_remaining_days():
+    plan = plan_replan(make_roadmap(5, completed={1}), preparation_days=3)
+
+    assert plan.total_days == 3
+    assert plan.kept_days == [1]
+    assert plan.regenerate_days == [2, 3]
+    assert plan.removed_days == [4, 5]
+
+
+def new_day_numbers(plan) -> list:
+    return sorted([plan.renumbered_days.get(day, day) for day in plan.kept_days] + plan.regenerate_days)
+
+
+def test_shorter_roadmap_counts_completed_days_toward_new_length():
+    plan = plan_replan(make_roadmap(3, completed={3}), preparation_days=2)
+
+    assert plan.total_days == 2
+    assert plan.kept_days == [3]
+    assert plan.renumbered_days == {3: 1}
+    assert plan.regenerate_days == [2]
+    assert plan.removed_days == [3]
+    assert new_day_numbers(plan) == [1, 2]
+
+
+def test_completed_days_are_never_dropped():
+    plan = plan_replan(make_roadmap(3), preparation_days=1, completed_days=[1, 2])
+
+    assert plan.total_days == 2
+    assert plan.kept_days == [1, 2]
+    assert plan.regenerate_days == []
+    assert plan.removed_days == [3]
+
+
+def test_interviewer_change_regenerates_every_uncompleted_day():
+    plan = plan_replan(make_roadmap(3), completed_days=[1], interviewer_changed=True)
+
+    assert plan.total_days == 3
+    assert plan.kept_days == [1]
+    assert plan.regenerate_days == [2, 3]
+    assert plan.removed_days == []
+
+
+def test_interviewer_change_moves_completed_days_to_the_front():
+    plan = plan_replan(make_roadmap(3), completed_days=[2], interviewer_changed=True)
+
+    assert plan.renumbered_days == {2: 1}
+    assert plan.regenerate_days == [2, 3]
+    assert new_day_numbers(plan) == [1, 2, 3]
+
+
+def test_partially_completed_day_carries_its_completed_tasks():
+    plan = plan_replan(make_roadmap(3, partial={2}), interviewer_changed=True)
+
+    assert plan.regenerate_days == [1, 2, 3]
+    assert list(plan.completed_tasks) == [2]
+    assert [task.task for task in plan.completed_tasks[2]] == ["Day 2 task 0"]
+
+
+def test_completed_tasks_of_a_removed_day_are_carried_over():
+    plan = plan_replan(make_roadmap(5, partial={5}), preparation_days=3)
+
+    assert plan.regenerate_days == [1, 2, 3]
+    assert plan.removed_days == [4, 5]
+    assert [task.task for task in plan.completed_tasks[3]] == ["Day 5 task 0"]
+
+
+def test_partial_day_gets_a_slot_when_completed_days_fill_the_roadmap():
+    plan = plan_replan(make_roadmap(3, completed={1, 3}, partial={2}), preparation_days=2)
+
+    assert plan.total_days == 3
+    assert plan.renumbered_days == {3: 2}
+    assert plan.regenerate_days == [3]
+    assert [task.task for task in plan.completed_tasks[3]] == ["Day 2 task 0"]
+    assert new_day_numbers(plan) == [1, 2, 3]
+
+
+def test_unchanged_roadmap_regenerates_nothing():
+    plan = plan_replan(make_roadmap(3))
+
+    assert plan.kept_days == [1, 2, 3]
+    assert plan.regenerate_days == []
+    assert plan.removed_days == []
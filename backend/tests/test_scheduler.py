@@ -0,0 +1,53 @@
+import asyncio
+import time
+
+from services.scheduler import LLMScheduler, Priority
+
+
+def test_aged_bulk_waiters_do_not_overtake_panic():
+    async def run():
+        scheduler = LLMScheduler(max_concurrency=1, aging_seconds=0.05)
+        order = []
+
+        async def call(name: str, priority: Priority):
+            async with scheduler.slot(priority):
+                order.append(name)
+                await asyncio.sleep(0.01)
+
+        await scheduler.acquire(Priority.INTERACTIVE)
+        bulk = [asyncio.create_task(call(f"bulk-{i}", Priority.BULK)) for i in range(3)]
+        await asyncio.sleep(0.2)  # bulk has aged by four classes
+        panic = asyncio.create_task(call("panic", Priority.PANIC))
+        await asyncio.sleep(0)
+        scheduler.release()
+        await asyncio.gather(panic, *bulk)
+        return order
+
+    assert asyncio.run(run())[0] == "panic"
+
+
+def test_panic_wait_stays_flat_under_bulk_load():
+    async def run():
+        scheduler = LLMScheduler(max_concurrency=2, aging_seconds=0.01)
+        panic_waits = []
+
+        async def bulk_worker():
+            for _ in range(10):
+                async with scheduler.slot(Priority.BULK):
+                    await asyncio.sleep(0.01)
+
+        async def panic_call():
+            start = time.monotonic()
+            async with scheduler.slot(Priority.PANIC):
+                panic_waits.append(time.monotonic() - start)
+                await asyncio.sleep(0.01)
+
+        workers = [asyncio.create_task(bulk_worker()) for _ in range(16)]
+        for _ in range(5):
+            await asyncio.sleep(0.05)
+            await panic_call()
+        await asyncio.gather(*workers)
+        return panic_waits
+
+    # At most one in-progress bulk call (~10ms) ahead of each panic request
+    assert max(asyncio.run(run())) < 0.03
@@ -0,0 +1,44 @@
+from google.genai import types
+
+from services import token_budget
+from services.model_router import config_for_model
+from services.token_budget import compute_budget
+
+
+def test_thinking_override_grows_max_output_tokens(monkeypatch):
+    default = compute_budget("panic_mode")
+    monkeypatch.setattr(token_budget, "BUDGET_OVERRIDES", {"panic_mode": {"thinking_budget": 8000}})
+
+    budget = compute_budget("panic_mode")
+
+    assert budget.thinking_budget == 8000
+    # The answer keeps the same share as without the override
+    assert budget.max_output_tokens - budget.thinking_budget == default.max_output_tokens - default.thinking_budget
+
+
+def test_explicit_max_output_override_is_kept(monkeypatch):
+    monkeypatch.setattr(token_budget, "BUDGET_OVERRIDES", {"panic_mode": {"thinking_budget": 8000, "max_output_tokens": 9000}})
+
+    budget = compute_budget("panic_mode")
+
+    assert (budget.max_output_tokens, budget.thinking_budget) == (9000, 8000)
+
+
+def test_fewer_tasks_need_fewer_tokens():
+    full = compute_budget("roadmap_days", preparation_days=2)
+    with_carried_tasks = compute_budget("roadmap_days", preparation_days=2, task_count=4)
+
+    assert with_carried_tasks.max_output_tokens < full.max_output_tokens
+
+
+def test_thinking_clamp_for_pro_grows_max_output_tokens():
+    config = types.GenerateContentConfig(
+        max_output_tokens=1000,
+        thinking_config=types.ThinkingConfig(thinking_budget=0),
+    )
+
+    pro = config_for_model(config, "gemini-2.5-pro")
+    flash = config_for_model(config, "gemini-2.5-flash")
+
+    assert (pro.max_output_tokens, pro.thinking_config.thinking_budget) == (1128, 128)
+    assert flash is config
@@ -0,0 +1,124 @@
+import asyncio
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import Base
+from services.scheduler import DeadlineExceeded, Priority, current_scheduling, scheduling
+from services.topic_library import GeneratedContent, TopicLibrary
+
+
+@pytest.fixture
+def library(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'topics.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    return TopicLibrary(session_factory=sessionmaker(bind=engine))
+
+
+def generator(*results: GeneratedContent):
+    calls = []
+
+    async def generate(topic, task_type, learning_style):
+        calls.append(topic)
+        return results[min(len(calls), len(results)) - 1]
+
+    return generate, calls
+
+
+def test_truncated_content_is_returned_but_not_stored(library):
+    generate, calls = generator(GeneratedContent("Kubernetes is", truncated=True), GeneratedContent("Kubernetes is an orchestrator."))
+
+    first = asyncio.run(library.get_or_generate("Kubernetes", "Read", "balanced", generate))
+    second = asyncio.run(library.get_or_generate("Kubernetes", "Read", "balanced", generate))
+
+    assert first == "Kubernetes is"
+    assert second == "Kubernetes is an orchestrator."
+    assert len(calls) == 2
+    assert library.lookup(("kubernetes", "read", "balanced")) == "Kubernetes is an orchestrator."
+
+
+def test_blank_streamed_content_is_not_stored(library):
+    async def stream(topic, task_type, learning_style):
+        yield GeneratedContent("  ")
+
+    async def collect():
+        return [text async for text in library.stream_or_generate("Kubernetes", "Read", "balanced", stream)]
+
+    assert asyncio.run(collect()) == ["  "]
+    assert not library.has_entry(("kubernetes", "read", "balanced"))
+
+
+def test_truncated_stream_is_not_stored(library):
+    async def stream(topic, task_type, learning_style):
+        yield GeneratedContent("Kubernetes is")
+        yield GeneratedContent("", truncated=True)
+
+    async def collect():
+        return [text async for text in library.stream_or_generate("Kubernetes", "Read", "balanced", stream)]
+
+    assert asyncio.run(collect()) == ["Kubernetes is"]
+    assert not library.has_entry(("kubernetes", "read", "balanced"))
+
+
+def test_regenerate_replaces_the_stored_entry(library):
+    generate, calls = generator(GeneratedContent("Old explainer"), GeneratedContent("New explainer"))
+
+    asyncio.run(library.get_or_generate("Kubernetes", "Read", "balanced", generate))
+    fresh = asyncio.run(library.get_or_generate("Kubernetes", "Read", "balanced", generate, regenerate=True))
+    after = asyncio.run(library.get_or_generate("Kubernetes", "Read", "balanced", generate))
+
+    assert (fresh, after) == ("New explainer", "New explainer")
+    assert len(calls) == 2
+
+
+def test_shared_generation_ignores_the_first_callers_deadline_and_priority(library):
+    seen = []
+
+    async def generate(topic, task_type, learning_style):
+        seen.append(current_scheduling.get())
+        await asyncio.sleep(0.2)
+        return GeneratedContent("Kubernetes is an orchestrator.")
+
+    async def hurried_prefetch():
+        with scheduling(priority=Priority.PREFETCH, deadline=time.monotonic() + 0.05):
+            return await library.get_or_generate("Kubernetes", "Read", "balanced", generate)
+
+    async def patient():
+        await asyncio.sleep(0.01)
+        return await library.get_or_generate("Kubernetes", "Read", "balanced", generate)
+
+    async def run():
+        return await asyncio.gather(hurried_prefetch(), patient(), return_exceptions=True)
+
+    hurried, waited = asyncio.run(run())
+
+    assert isinstance(hurried, DeadlineExceeded)
+    assert waited == "Kubernetes is an orchestrator."
+    assert len(seen) == 1
+    assert (seen[0].priority, seen[0].deadline) == (None, None)
+
+
+def test_stream_leader_deadline_only_ends_its_own_wait(library):
+    async def stream(topic, task_type, learning_style):
+        yield GeneratedContent("Kubernetes ")
+        await asyncio.sleep(0.2)
+        yield GeneratedContent("is an orchestrator.")
+
+    async def leader():
+        with scheduling(deadline=time.monotonic() + 0.05):
+            return [text async for text in library.stream_or_generate("Kubernetes", "Read", "balanced", stream)]
+
+    async def follower():
+        await asyncio.sleep(0.01)
+        return [text async for text in library.stream_or_generate("Kubernetes", "Read", "balanced", stream)]
+
+    async def run():
+        return await asyncio.gather(leader(), follower(), return_exceptions=True)
+
+    led, followed = asyncio.run(run())
+
+    assert isinstance(led, DeadlineExceeded)
+    assert followed == ["Kubernetes is an orchestrator."]
+    assert library.lookup(("kubernetes", "read", "balanced")) == "Kubernetes is an orchestrator."
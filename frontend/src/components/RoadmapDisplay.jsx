@@ -12,7 +12,7 @@ import {
   StickyNote,
   Download
 } from 'lucide-react';
-import { generateTopicContent } from '../services/api';
+import { streamTopicContent } from '../services/api';
 import TaskDetailModal from './TaskDetailModal';
 
 const RoadmapDisplay = ({ data, onBack, userName, resumeText, jdText, savedProgress }) => {
@@ -50,22 +50,24 @@ const RoadmapDisplay = ({ data, onBack, userName, resumeText, jdText, savedProgr
     setTaskNotes(prev => ({ ...prev, [taskId]: note }));
   };
 
-  const generateAIContent = async (dayIndex, taskIndex, task) => {
+  const generateAIContent = async (dayIndex, taskIndex, task, regenerate = false) => {
     const taskId = `${dayIndex}-${taskIndex}`;
     
     try {
       setLoadingAI(prev => ({ ...prev, [taskId]: true }));
+      setAiContent(prev => ({ ...prev, [taskId]: '' }));
       
-      const result = await generateTopicContent(
+      // Render markdown as it streams in instead of waiting for the full generation
+      await streamTopicContent(
         resumeText || '',
         jdText || '',
         task.task,
         task.type,
         learningStyle,
-        data.gap_analysis
+        data.gap_analysis,
+        (text) => setAiContent(prev => ({ ...prev, [taskId]: (prev[taskId] || '') + text })),
+        regenerate
       );
-      
-      setAiContent(prev => ({ ...prev, [taskId]: result.content }));
     } catch (err) {
       console.error('Failed to generate AI content:', err);
       setAiContent(prev => ({ ...prev, [taskId]: 'Failed to generate content. Please try again.' }));
@@ -406,6 +408,7 @@ const RoadmapDisplay = ({ data, onBack, userName, resumeText, jdText, savedProgr
           aiContent={aiContent[selectedTask.taskId]}
           isGeneratingAI={loadingAI[selectedTask.taskId]}
           onGenerateAI={() => generateAIContent(selectedTask.dayIndex, selectedTask.taskIndex, selectedTask.task)}
+          onRegenerateAI={() => generateAIContent(selectedTask.dayIndex, selectedTask.taskIndex, selectedTask.task, true)}
           learningStyle={learningStyle}
         />
       )}
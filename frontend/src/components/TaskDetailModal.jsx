@@ -21,6 +21,7 @@ const TaskDetailModal = ({
   aiContent,
   isGeneratingAI,
   onGenerateAI,
+  onRegenerateAI,
   learningStyle
 }) => {
   if (!isOpen) return null;
@@ -151,7 +152,7 @@ const TaskDetailModal = ({
                 </div>
               )}
 
-              {isGeneratingAI && (
+              {isGeneratingAI && !aiContent && (
                 <div className="bg-gradient-to-br from-purple-50 to-blue-50 border-2 border-purple-200 rounded-lg p-8">
                   <div className="flex flex-col items-center gap-4">
                     <Loader2 className="animate-spin text-purple-600" size={40} />
@@ -167,19 +168,24 @@ const TaskDetailModal = ({
                 </div>
               )}
 
-              {aiContent && !isGeneratingAI && (
+              {aiContent && (
                 <div className="space-y-3">
                   <div className="bg-gradient-to-br from-purple-50 to-blue-50 border-2 border-purple-200 rounded-lg p-5">
                     <MarkdownRenderer content={aiContent} />
+                    {isGeneratingAI && (
+                      <Loader2 className="animate-spin text-purple-600 mt-3" size={20} />
+                    )}
                   </div>
-                  <button
-                    onClick={onGenerateAI}
-                    disabled={isGeneratingAI}
-                    className="w-full px-4 py-2 bg-purple-50 hover:bg-purple-100 text-purple-700 font-medium rounded-lg transition-all border-2 border-purple-200 hover:border-purple-300 flex items-center justify-center gap-2"
-                  >
-                    <Sparkles size={16} />
-                    Regenerate Content
-                  </button>
+                  {!isGeneratingAI && (
+                    <button
+                      onClick={onRegenerateAI}
+                      disabled={isGeneratingAI}
+                      className="w-full px-4 py-2 bg-purple-50 hover:bg-purple-100 text-purple-700 font-medium rounded-lg transition-all border-2 border-purple-200 hover:border-purple-300 flex items-center justify-center gap-2"
+                    >
+                      <Sparkles size={16} />
+                      Regenerate Content
+                    </button>
+                  )}
                 </div>
               )}
             </section>
@@ -1,6 +1,6 @@
-import { useState } from 'react';
+import { useRef, useState } from 'react';
 import { useAuth } from '../context/AuthContext';
-import { analyzeGap, parseFile, generatePanicMode } from '../services/api';
+import { analyzeGap, parseFile, streamPanicMode } from '../services/api';
 import RoadmapDisplay from '../components/RoadmapDisplay';
 import Header from '../components/Header';
 import UserProfile from '../components/UserProfile';
@@ -16,6 +16,14 @@ import {
   Zap
 } from 'lucide-react';
 
+const EMPTY_PANIC_DATA = {
+  critical_gaps: [],
+  quick_wins: [],
+  must_know_topics: [],
+  survival_tips: [],
+  talking_points: [],
+};
+
 const Dashboard = () => {
   const { user, signOut } = useAuth();
   const [resumeText, setResumeText] = useState('');
@@ -29,6 +37,10 @@ const Dashboard = () => {
   const [showYourRoadmap, setShowYourRoadmap] = useState(false);
   const [panicModeData, setPanicModeData] = useState(null);
   const [panicLoading, setPanicLoading] = useState(false);
+  const panicRunRef = useRef(0);
+  // Inputs of the last submission; submitting the same inputs again asks for a fresh result
+  const lastRoadmapRequestRef = useRef(null);
+  const lastPanicRequestRef = useRef(null);
   const [preparationMode, setPreparationMode] = useState('interview'); // 'learn' or 'interview'
   const [interviewerType, setInterviewerType] = useState('technical');
   const [learningStyle, setLearningStyle] = useState('theory_code'); // 'project' or 'theory_code'
@@ -56,17 +68,22 @@ const Dashboard = () => {
       return;
     }
 
+    const requestArgs = [
+      resumeText, 
+      jdText, 
+      preparationDays,
+      preparationMode,
+      preparationMode === 'interview' ? interviewerType : null,
+      preparationMode === 'learn' ? learningStyle : 'theory_code'
+    ];
+    const requestKey = JSON.stringify(requestArgs);
+    const regenerate = requestKey === lastRoadmapRequestRef.current;
+
     try {
       setLoading(true);
       setError(null);
-      const result = await analyzeGap(
-        resumeText, 
-        jdText, 
-        preparationDays,
-        preparationMode,
-        preparationMode === 'interview' ? interviewerType : null,
-        preparationMode === 'learn' ? learningStyle : 'theory_code'
-      );
+      const result = await analyzeGap(...requestArgs, regenerate);
+      lastRoadmapRequestRef.current = requestKey;
       setRoadmapData(result);
     } catch (err) {
       setError('Failed to generate roadmap. Please try again.');
@@ -99,31 +116,61 @@ const Dashboard = () => {
       return;
     }
 
+    // Ignore late sections from a stream the user has already left
+    const runId = ++panicRunRef.current;
+    const interviewer = preparationMode === 'interview' ? interviewerType : null;
+    const requestKey = JSON.stringify([resumeText, jdText, preparationMode, interviewer]);
+    const regenerate = requestKey === lastPanicRequestRef.current;
+
     try {
       setPanicLoading(true);
       setError(null);
-      const result = await generatePanicMode(
+      // Show each section as soon as it arrives instead of waiting for the whole cheat sheet
+      await streamPanicMode(
         resumeText, 
         jdText,
         preparationMode,
-        preparationMode === 'interview' ? interviewerType : null
+        interviewer,
+        (section, value) => {
+          if (runId !== panicRunRef.current || section === 'done') return;
+          setPanicModeData(prev => {
+            const current = prev || EMPTY_PANIC_DATA;
+            if (section === 'must_know_topic') {
+              return { ...current, must_know_topics: [...current.must_know_topics, value] };
+            }
+            return { ...current, [section]: value };
+          });
+        },
+        regenerate
       );
-      setPanicModeData(result);
+      lastPanicRequestRef.current = requestKey;
     } catch (err) {
-      setError('Failed to generate panic mode cheat sheet. Please try again.');
+      if (runId === panicRunRef.current) {
+        setPanicModeData(null);
+        setError('Failed to generate panic mode cheat sheet. Please try again.');
+      }
       console.error(err);
     } finally {
-      setPanicLoading(false);
+      if (runId === panicRunRef.current) {
+        setPanicLoading(false);
+      }
     }
   };
 
+  const leavePanicMode = () => {
+    panicRunRef.current += 1;
+    setPanicLoading(false);
+    setPanicModeData(null);
+  };
+
   if (panicModeData) {
     return (
       <PanicMode
         user={user}
         onSignOut={handleSignOut}
-        onBack={() => setPanicModeData(null)}
+        onBack={leavePanicMode}
         panicData={panicModeData}
+        isGenerating={panicLoading}
         resumeText={resumeText}
         jdText={jdText}
       />
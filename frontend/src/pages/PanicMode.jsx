@@ -15,7 +15,7 @@ import {
 import Header from '../components/Header';
 import MarkdownRenderer from '../components/MarkdownRenderer';
 
-const PanicMode = ({ user, onSignOut, onBack, panicData, resumeText, jdText }) => {
+const PanicMode = ({ user, onSignOut, onBack, panicData, resumeText, jdText, isGenerating = false }) => {
   const [expandedSection, setExpandedSection] = useState(null);
 
   const toggleSection = (section) => {
@@ -121,6 +121,12 @@ const PanicMode = ({ user, onSignOut, onBack, panicData, resumeText, jdText }) =
                 <Clock size={16} />
                 <span>Generated: {new Date().toLocaleTimeString()}</span>
               </div>
+              {isGenerating && (
+                <div className="flex items-center gap-1 text-red-600 font-semibold">
+                  <Loader2 size={16} className="animate-spin" />
+                  <span>Still generating...</span>
+                </div>
+              )}
             </div>
           </div>
         </div>
@@ -129,6 +135,7 @@ const PanicMode = ({ user, onSignOut, onBack, panicData, resumeText, jdText }) =
         <div className="mb-8 text-center">
           <button
             onClick={downloadCheatSheet}
+            disabled={isGenerating}
             className="bg-gradient-to-r from-red-600 to-orange-600 hover:from-red-700 hover:to-orange-700 text-white font-bold py-4 px-8 rounded-xl shadow-2xl hover:shadow-3xl transition-all transform hover:scale-105 flex items-center gap-3 mx-auto text-lg"
           >
             <Download size={24} />
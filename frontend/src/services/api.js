@@ -19,7 +19,10 @@ export const getUser = async (googleId) => {
   return response.data;
 };
 
-export const analyzeGap = async (resumeText, jdText, preparationDays, interviewMode = 'interview', interviewerType = 'technical', learningStyle = 'theory_code') => {
+// Asks the backend to skip its result cache and generate a fresh result
+const FRESH_RESULT_HEADERS = { 'Cache-Control': 'no-cache' };
+
+export const analyzeGap = async (resumeText, jdText, preparationDays, interviewMode = 'interview', interviewerType = 'technical', learningStyle = 'theory_code', regenerate = false) => {
   const response = await api.post('/analyze_gap', {
     resume_text: resumeText,
     jd_text: jdText,
@@ -27,7 +30,7 @@ export const analyzeGap = async (resumeText, jdText, preparationDays, interviewM
     interview_mode: interviewMode,
     interviewer_type: interviewerType,
     learning_style: learningStyle,
-  });
+  }, regenerate ? { headers: FRESH_RESULT_HEADERS } : undefined);
   return response.data;
 };
 
@@ -65,4 +68,79 @@ export const generatePanicMode = async (resumeText, jdText, interviewMode = 'int
   return response.data;
 };
 
+// POST a JSON body and invoke onEvent(event, data) for each Server-Sent Event received.
+// Resolves once the "done" event arrives; rejects on HTTP errors, an "error" event,
+// or a stream that ends early (dropped connection, proxy timeout).
+const postEventStream = async (path, body, onEvent, headers = {}) => {
+  const response = await fetch(`${API_URL}${path}`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+      Accept: 'text/event-stream',
+      ...headers,
+    },
+    body: JSON.stringify(body),
+  });
+  if (!response.ok || !response.body) {
+    throw new Error(`Request failed with status ${response.status}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  let completed = false;
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const rawEvent = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+
+      let event = 'message';
+      let data = '';
+      rawEvent.split('\n').forEach((line) => {
+        if (line.startsWith('event: ')) event = line.slice(7);
+        else if (line.startsWith('data: ')) data += line.slice(6);
+      });
+
+      const payload = data ? JSON.parse(data) : null;
+      if (event === 'error') {
+        throw new Error(payload?.detail || 'Stream failed');
+      }
+      if (event === 'done') completed = true;
+      onEvent(event, payload);
+    }
+  }
+
+  if (!completed) {
+    throw new Error('Stream ended before the result was complete');
+  }
+};
+
+export const streamTopicContent = async (resumeText, jdText, topic, taskType, learningStyle, gapAnalysis, onDelta, regenerate = false) => {
+  await postEventStream('/generate_topic_content/stream', {
+    resume_text: resumeText,
+    jd_text: jdText,
+    topic: topic,
+    task_type: taskType,
+    learning_style: learningStyle,
+    gap_analysis: gapAnalysis,
+  }, (event, data) => {
+    if (event === 'delta') onDelta(data.text);
+  }, regenerate ? FRESH_RESULT_HEADERS : {});
+};
+
+export const streamPanicMode = async (resumeText, jdText, interviewMode = 'interview', interviewerType = 'technical', onSection, regenerate = false) => {
+  await postEventStream('/panic_mode/stream', {
+    resume_text: resumeText,
+    jd_text: jdText,
+    interview_mode: interviewMode,
+    interviewer_type: interviewerType
+  }, onSection, regenerate ? FRESH_RESULT_HEADERS : {});
+};
+
 export default api;